@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+import hashlib
+import time
+import re
+
+CACHE_DB_NAME = "advice_cache.db"
+
+class AdviceCache:
+    """
+    Persistent cache of LLM advice, keyed on the prompt template, the normalized
+    context text (e.g. the "missing info" prompt or "Tentang {crop}" tips) and the
+    normalized user question, since every prompt quotes the question.
+    Entries expire after `ttl_seconds`; beyond `max_entries` the least recently
+    used ones are evicted.
+    """
+    def __init__(self, db_name=CACHE_DB_NAME, max_entries=5000, ttl_seconds=7 * 24 * 3600):
+        self.db_name = db_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def get_connection(self):
+        return sqlite3.connect(self.db_name, timeout=10)
+
+    def init_db(self):
+        conn = self.get_connection()
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS advice_cache (
+                key TEXT PRIMARY KEY,
+                template TEXT,
+                context TEXT,
+                response TEXT,
+                created_at REAL,
+                last_used REAL
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_advice_cache_last_used ON advice_cache (last_used)')
+        conn.commit()
+        conn.close()
+
+    def normalize(self, text):
+        return re.sub(r'\s+', ' ', str(text).lower()).strip()
+
+    def normalize_query(self, query):
+        """Question text with case, punctuation and spacing ignored ("Cara tanam jahe?" == "cara  tanam jahe")."""
+        return self.normalize(re.sub(r'[^\w\s]', ' ', str(query)))
+
+    def make_key(self, template, context_text, query=''):
+        raw = f"{template}\x00{self.normalize(context_text)}\x00{self.normalize_query(query)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, template, context_text, query=''):
+        key = self.make_key(template, context_text, query)
+        now = time.time()
+        conn = self.get_connection()
+        c = conn.cursor()
+        c.execute('SELECT response FROM advice_cache WHERE key = ? AND created_at > ?',
+                  (key, now - self.ttl_seconds))
+        row = c.fetchone()
+        if row:
+            c.execute('UPDATE advice_cache SET last_used = ? WHERE key = ?', (now, key))
+            conn.commit()
+        conn.close()
+
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, template, context_text, response, query=''):
+        key = self.make_key(template, context_text, query)
+        now = time.time()
+        conn = self.get_connection()
+        c = conn.cursor()
+        c.execute('INSERT OR REPLACE INTO advice_cache (key, template, context, response, created_at, last_used) '
+                  'VALUES (?, ?, ?, ?, ?, ?)',
+                  (key, template, self.normalize(context_text), response, now, now))
+
+        # Drop expired entries, then the least recently used beyond the size bound
+        c.execute('DELETE FROM advice_cache WHERE created_at <= ?', (now - self.ttl_seconds,))
+        c.execute('''
+            DELETE FROM advice_cache WHERE key IN (
+                SELECT key FROM advice_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        ''', (self.max_entries,))
+        conn.commit()
+        conn.close()
+
+    def stats(self):
+        conn = self.get_connection()
+        size = conn.execute('SELECT COUNT(*) FROM advice_cache').fetchone()[0]
+        conn.close()
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds
+        }
@@ -1,24 +1,47 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from prediction_engine import CropPredictor
-import requests
 import datetime
-import difflib 
+import json
+import pandas as pd
 import re
 from waitress import serve 
+import os
+import sys
+import signal
 import database as db
+from prefork import serve_prefork
+from llm_client import AdviceClient
+from advice_cache import AdviceCache
+from session_memory import SessionMemory
+from batch_predict import read_batch, iter_results as iter_batch_results
+from entity_index import EntityIndex, CITY, crop_aliases
 
 app = Flask(__name__)
 CORS(app)
 
+# --- SERVING MODE ---
+# AGROTIME_WORKERS > 1 forks that many worker processes sharing one loaded engine.
+# Each worker then scores single-threaded; throughput scales with processes instead.
+SERVE_WORKERS = int(os.environ.get('AGROTIME_WORKERS', '1'))
+SERVE_THREADS = int(os.environ.get('AGROTIME_THREADS', '6'))
+
 print("Initializing AI Engine...")
-engine = CropPredictor()
+engine = CropPredictor(n_threads=1 if SERVE_WORKERS > 1 else None)
 
 # --- DATABASE INIT ---
 db.init_db()
 
-# --- 1. GLOBAL MEMORY ---
-SESSION_MEMORY = {"crop": None, "province": None}
+# CHAT_WRITE_BEHIND=1 takes message logging off the request path: messages are queued
+# and committed in batches by a background thread (flushed on shutdown).
+if os.environ.get('CHAT_WRITE_BEHIND', '0') == '1':
+    db.enable_write_behind()
+
+# --- 1. SESSION MEMORY ---
+# Last crop/province per chat session, cached in-process and stored in the sessions table.
+# With several workers every read goes to the table, so any worker can serve any session.
+session_memory = SessionMemory(maxsize=int(os.environ.get('SESSION_MEMORY_SIZE', '1024')),
+                               revalidate=SERVE_WORKERS > 1)
 
 # --- 2. CONFIGURATION ---
 STOPWORDS = {
@@ -29,13 +52,7 @@ STOPWORDS = {
     'misal', 'sebaiknya', 'rekomendasi', 'tterbaik', 'kpan', 'dimana', 'lokasi', 'tempat', 'kota', 'provinsi'
 }
 
-CROP_ALIASES = {}
-for crop_key in engine.duration_lookup.keys():
-    clean_key = crop_key.lower().strip()
-    CROP_ALIASES[clean_key] = crop_key 
-    if '/' in clean_key:
-        for part in clean_key.split('/'):
-            CROP_ALIASES[part.strip()] = crop_key
+CROP_ALIASES = crop_aliases(engine.duration_lookup.keys())
 
 CITY_TO_PROVINCE = {
     # SUMATERA
@@ -156,13 +173,35 @@ CITY_TO_PROVINCE = {
     'tolikara': 'papua pegunungan'
 }
 
+# Every city/province/crop alias compiled once; extract_entities scans the text a single time
+ENTITY_INDEX = EntityIndex(CITY_TO_PROVINCE, engine.soil_lookup.keys(), CROP_ALIASES)
+
+
+# Only ever read from the environment. Without it the model still answers, minus the LLM advice.
+DEEPSEEK_API_KEY = os.environ.get('DEEPSEEK_API_KEY')
+if not DEEPSEEK_API_KEY:
+    print("WARNING: DEEPSEEK_API_KEY is not set; LLM advice is disabled.")
+DEEPSEEK_URL = os.environ.get('DEEPSEEK_URL', "https://openrouter.ai/api/v1/chat/completions")
+MODEL_NAME = os.environ.get('DEEPSEEK_MODEL', "deepseek/deepseek-r1-0528:free")
 
-DEEPSEEK_API_KEY = "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"
-DEEPSEEK_URL = "https://openrouter.ai/api/v1/chat/completions"
-MODEL_NAME = "deepseek/deepseek-r1-0528:free"
+# LLM calls run on their own bounded pool. Keep concurrency + queue below the
+# waitress thread count so slow upstream calls never occupy every server thread.
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '3'))
+LLM_MAX_QUEUE = int(os.environ.get('LLM_MAX_QUEUE', '2'))
+advice_client = AdviceClient(DEEPSEEK_URL, DEEPSEEK_API_KEY, MODEL_NAME,
+                             max_concurrency=LLM_MAX_CONCURRENCY, max_queue=LLM_MAX_QUEUE)
 
-def get_deepseek_advice(user_query, context_text, missing_info=False):
-    if not DEEPSEEK_API_KEY: return "AI Advice Unavailable."
+# Upper bound on rows per /v1/predict/batch request
+BATCH_MAX_ROWS = int(os.environ.get('BATCH_MAX_ROWS', '200000'))
+
+# Persistent advice cache (advice_cache.db, next to chat_history.db).
+# Requests can bypass it with {"no_cache": true}.
+advice_cache = AdviceCache(
+    max_entries=int(os.environ.get('ADVICE_CACHE_MAX_ENTRIES', '5000')),
+    ttl_seconds=int(os.environ.get('ADVICE_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+)
+
+def build_advice_prompt(user_query, context_text, missing_info=False):
     if missing_info:
         prompt = f"""User: "{user_query}"\nSistem: "{context_text}"\nTugas: Minta user melengkapi data TANAMAN atau LOKASI. Gunakan format Markdown (bold, list) agar mudah dibaca."""
     else:
@@ -174,47 +213,61 @@ def get_deepseek_advice(user_query, context_text, missing_info=False):
         - Gunakan List (-) untuk langkah-langkah.
         - Hindari teks blok panjang.
         """
+    return prompt
+
+ADVICE_UNAVAILABLE = "AI Advice Unavailable: DEEPSEEK_API_KEY is not set on the server."
+
+def advice_template(missing_info):
+    return 'missing_info' if missing_info else 'advice'
+
+def get_deepseek_advice(user_query, context_text, missing_info=False, use_cache=True):
+    if not DEEPSEEK_API_KEY: return ADVICE_UNAVAILABLE
+    template = advice_template(missing_info)
+    if use_cache:
+        cached = advice_cache.get(template, context_text, user_query)
+        if cached is not None: return cached
+    try:
+        advice = advice_client.complete(build_advice_prompt(user_query, context_text, missing_info))
+    except Exception as e:
+        print(f"DEBUG: LLM advice failed -> {e}")
+        return "Maaf, AI sedang sibuk."
+    if advice: advice_cache.put(template, context_text, advice, user_query)
+    return advice
+
+def stream_deepseek_advice(user_query, context_text, missing_info=False, use_cache=True):
+    """Same as get_deepseek_advice, but yields the advice token by token."""
+    if not DEEPSEEK_API_KEY:
+        yield ADVICE_UNAVAILABLE
+        return
+    template = advice_template(missing_info)
+    if use_cache:
+        cached = advice_cache.get(template, context_text, user_query)
+        if cached is not None:
+            yield cached
+            return
+    parts = []
     try:
-        headers = {"Authorization": f"Bearer {DEEPSEEK_API_KEY}", "Content-Type": "application/json"}
-        payload = {"model": MODEL_NAME, "messages": [{"role": "user", "content": prompt}], "temperature": 0.6}
-        response = requests.post(DEEPSEEK_URL, json=payload, headers=headers, timeout=30)
-        data = response.json()
-        if 'choices' in data: return data['choices'][0]['message']['content']
-    except: return "Maaf, AI sedang sibuk."
+        for token in advice_client.stream(build_advice_prompt(user_query, context_text, missing_info)):
+            parts.append(token)
+            yield token
+    except Exception as e:
+        print(f"DEBUG: LLM advice stream failed -> {e}")
+        if not parts: yield "Maaf, AI sedang sibuk."
+        return
+    if not parts:
+        yield "Maaf, AI sedang sibuk."
+        return
+    advice_cache.put(template, context_text, "".join(parts), user_query)
 
 def extract_entities(text):
     if not text: return None, None
     clean_text = re.sub(r'[^\w\s]', ' ', text.lower())
-    found_crop, found_prov = None, None
-    
-    # 1. Location Detection
-    for city, prov in CITY_TO_PROVINCE.items():
-        if city in clean_text: 
-            found_prov = prov
-            print(f"DEBUG: Mapped City '{city}' to Province '{prov}'") # <-- DEBUG RESTORED
-            break
-    if not found_prov:
-        for prov in engine.soil_lookup.keys():
-            if prov.lower() in clean_text: 
-                found_prov = prov
-                break
-
-    # 2. Crop Detection
-    all_aliases = sorted(CROP_ALIASES.keys(), key=len, reverse=True)
-    for alias in all_aliases:
-        if re.search(r'\b' + re.escape(alias) + r'\b', clean_text): 
-            found_crop = CROP_ALIASES[alias]
-            break
-            
-    if not found_crop:
-        words = clean_text.split()
-        for word in words:
-            if len(word) < 3 or word in STOPWORDS: continue 
-            matches = difflib.get_close_matches(word, all_aliases, n=1, cutoff=0.8)
-            if matches: 
-                found_crop = CROP_ALIASES[matches[0]]
-                print(f"DEBUG: Fuzzy Matched Typo '{word}' -> '{matches[0]}'") # <-- DEBUG RESTORED
-                break
+    found_crop, found_prov, notes = ENTITY_INDEX.extract(clean_text, skip=STOPWORDS)
+    for kind, word, alias in notes:
+        if kind == CITY and word == alias:
+            print(f"DEBUG: Mapped City '{alias}' to Province '{found_prov}'") # <-- DEBUG RESTORED
+        else:
+            print(f"DEBUG: Fuzzy Matched Typo '{word}' -> '{alias}'") # <-- DEBUG RESTORED
     return found_crop, found_prov
 
 def parse_date(query):
@@ -264,9 +317,22 @@ def parse_date(query):
 
 # --- ROUTES ---
 
+def page_args(default_limit, parse_cursor, max_limit=500):
+    """(limit, parsed cursor or None) from the query string; ValueError for a malformed cursor."""
+    try:
+        limit = int(request.args.get('limit', default_limit))
+    except ValueError:
+        limit = default_limit
+    cursor = request.args.get('cursor')
+    return max(1, min(limit, max_limit)), parse_cursor(cursor) if cursor else None
+
 @app.route('/sessions', methods=['GET'])
 def list_sessions():
-    return jsonify(db.get_sessions())
+    try:
+        limit, cursor = page_args(50, db.parse_sessions_cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(db.get_sessions_page(limit, cursor))
 
 @app.route('/sessions', methods=['POST'])
 def create_new_session():
@@ -277,50 +343,55 @@ def create_new_session():
 
 @app.route('/sessions/<session_id>/messages', methods=['GET'])
 def get_session_messages(session_id):
-    return jsonify(db.get_messages(session_id))
+    try:
+        limit, cursor = page_args(100, db.parse_messages_cursor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(db.get_messages_page(session_id, limit, cursor))
 
 @app.route('/sessions/<session_id>', methods=['DELETE'])
 def delete_session(session_id):
     db.delete_session(session_id)
+    session_memory.forget(session_id)
     return jsonify({"status": "deleted", "id": session_id})
 
-@app.route('/predict', methods=['POST'])
-def predict():
-    data = request.json
-    query = data.get('query', '').lower()
-    session_id = data.get('session_id')
-    
-    # Save User Message if session exists
-    if session_id:
-        db.add_message(session_id, "user", query)
-
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        "llm": advice_client.stats(),
+        "advice_cache": advice_cache.stats(),
+        "optimization_cache": engine.optimization_cache.stats(),
+        "session_memory": session_memory.stats(),
+        "message_queue_depth": db.pending_messages(),
+        "engine_memory": engine.memory_footprint()
+    })
+
+def plan_response(query, session_id=None):
+    """
+    Runs every deterministic step of a chat turn (memory, entities, model).
+    Memory is per `session_id`; without one, the turn only sees its own entities.
+    Returns (result_text, ai_message, advice): `advice` is the (context_text, missing_info)
+    pair still to be sent to the LLM, or None when `ai_message` is already final.
+    """
     # Reset Memory
     if any(w in query for w in ['reset', 'ulang', 'hapus']):
-        SESSION_MEMORY['crop'], SESSION_MEMORY['province'] = None, None
-        msg = "Oke, memori direset."
-        if session_id: db.add_message(session_id, "ai", msg)
-        return jsonify({"result_text": "Reset", "ai_message": msg})
+        session_memory.reset(session_id)
+        return "Reset", "Oke, memori direset.", None
 
     # Extract Entities
     new_crop, new_prov = extract_entities(query)
-    if new_crop: SESSION_MEMORY['crop'] = new_crop
-    if new_prov: SESSION_MEMORY['province'] = new_prov
+    memory = session_memory.update(session_id, crop=new_crop, province=new_prov)
     
-    final_crop = SESSION_MEMORY['crop']
-    final_prov = SESSION_MEMORY['province']
+    final_crop = memory['crop']
+    final_prov = memory['province']
     
     print(f"DEBUG: Context -> Crop: {final_crop}, Prov: {final_prov}") # <-- DEBUG RESTORED
 
     # General Knowledge Check
     if any(w in query for w in ['bagaimana', 'cara', 'tips']) and not final_prov:
         if not final_crop: 
-            ai_msg = get_deepseek_advice(query, "No Crop Detected", True)
-            if session_id: db.add_message(session_id, "ai", ai_msg)
-            return jsonify({"result_text": "Butuh Info", "ai_message": ai_msg})
-        
-        ai_msg = get_deepseek_advice(query, f"Tentang {final_crop}")
-        if session_id: db.add_message(session_id, "ai", ai_msg)
-        return jsonify({"result_text": "Info Umum", "ai_message": ai_msg})
+            return "Butuh Info", None, ("No Crop Detected", True)
+        return "Info Umum", None, (f"Tentang {final_crop}", False)
 
     # Missing Info Check
     if not final_crop or not final_prov:
@@ -328,9 +399,7 @@ def predict():
         if not final_crop: missing.append("Tanaman")
         if not final_prov: missing.append("Lokasi")
         
-        ai_msg = get_deepseek_advice(query, f"Missing: {missing}. Have: Crop={final_crop}, Loc={final_prov}", True)
-        if session_id: db.add_message(session_id, "ai", ai_msg)
-        return jsonify({"result_text": "Butuh Info", "ai_message": ai_msg})
+        return "Butuh Info", None, (f"Missing: {missing}. Have: Crop={final_crop}, Loc={final_prov}", True)
 
     # --- MAIN LOGIC ---
     is_optimization = any(w in query for w in ['kapan', 'terbaik', 'optimal'])
@@ -374,12 +443,146 @@ def predict():
             f"{status_msg}"
         )
 
-    ai_response = get_deepseek_advice(query, result_text)
+    return result_text, None, (result_text, False)
+
+@app.route('/v1/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Structured yields for many (crop, province, planting_date) rows: JSON array or
+    CSV/Arrow upload in, NDJSON (or CSV with ?format=csv) streamed out. No LLM.
+    planting_date should be ISO (YYYY-MM-DD); other formats are read day first
+    (DD/MM/YYYY). Rows with an unknown crop or province or a bad date come back
+    with an `error` and no yield.
+    """
+    try:
+        frame = read_batch(request)
+    except (ValueError, pd.errors.ParserError) as e:
+        return jsonify({"error": str(e)}), 400
+    if len(frame) > BATCH_MAX_ROWS:
+        return jsonify({"error": f"Batch too large: {len(frame)} rows (max {BATCH_MAX_ROWS})"}), 413
+
+    fmt = 'csv' if request.args.get('format') == 'csv' else 'ndjson'
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(iter_batch_results(engine, frame, fmt)), mimetype=mimetype)
+
+@app.route('/v1/optimize', methods=['POST'])
+def optimize():
+    """
+    Best planting dates for many crops x provinces in one batched pass.
+    Body: {"crops": [...], "provinces": [...], "top_k": 1, "min_gap_days": 30}
+    (omitted lists mean every crop / every province). Returns the ranked table.
+    """
+    data = request.get_json(silent=True) or {}
+    crops = data.get('crops') or None
+    if crops:
+        crop_names = {crop.lower(): crop for crop in engine.duration_lookup.keys()}
+        unknown = [c for c in crops if str(c).strip().lower() not in crop_names]
+        if unknown:
+            return jsonify({"error": f"Unknown crops: {unknown}"}), 400
+        crops = [crop_names[str(c).strip().lower()] for c in crops]
+    provinces = data.get('provinces') or None
+    if provinces:
+        # Unknown provinces would be scored on default weather/soil and ranked anyway
+        unknown = [p for p in provinces if engine.normalize_province(p) not in engine.province_index]
+        if unknown:
+            return jsonify({"error": f"Unknown provinces: {unknown}"}), 400
+    try:
+        top_k = max(1, min(int(data.get('top_k', 1)), 12))
+        min_gap_days = max(1, int(data.get('min_gap_days', 30)))
+    except (TypeError, ValueError):
+        return jsonify({"error": "top_k and min_gap_days must be integers"}), 400
+
+    table = engine.optimize_planting(crops, provinces, top_k=top_k, min_gap_days=min_gap_days)
+    return jsonify({"rows": table.to_dict('records')})
+
+@app.route('/v1/planting-windows', methods=['POST'])
+def planting_windows():
+    """
+    Top-k non-overlapping planting windows for one crop/province over any horizon.
+    Body: {"crop", "province", "start_date", "horizon_days": 365, "step_days": 7,
+    "top_k": 3, "min_gap_days": <crop duration>}
+    """
+    data = request.get_json(silent=True) or {}
+    crop_names = {crop.lower(): crop for crop in engine.duration_lookup.keys()}
+    crop = crop_names.get(str(data.get('crop', '')).strip().lower())
+    if crop is None:
+        return jsonify({"error": f"Unknown crop: {data.get('crop')}"}), 400
+    province = engine.normalize_province(data.get('province'))
+    if province not in engine.province_index:
+        return jsonify({"error": f"Unknown province: {data.get('province')}"}), 400
+    try:
+        start_date = pd.Timestamp(data['start_date']) if data.get('start_date') else None
+        horizon_days = max(1, min(int(data.get('horizon_days', 365)), 10 * 366))
+        step_days = max(1, int(data.get('step_days', 7)))
+        top_k = max(1, min(int(data.get('top_k', 3)), 24))
+        min_gap_days = int(data['min_gap_days']) if data.get('min_gap_days') else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "start_date must be a date; horizon_days, step_days, top_k and min_gap_days integers"}), 400
+
+    table = engine.search_planting_windows(crop, province, start_date, horizon_days,
+                                           step_days, top_k, min_gap_days)
+    return jsonify({"crop": crop, "province": province, "windows": table.to_dict('records')})
+
+def chat_message(result_text, advice_text):
+    """The AI chat message as shown and stored by both /predict routes: the model result, then the advice."""
+    return f"{result_text}\n\n{advice_text}"
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    data = request.json
+    query = data.get('query', '').lower()
+    session_id = data.get('session_id')
+    use_cache = not data.get('no_cache', False)
+    
+    # Save User Message if session exists
+    if session_id:
+        db.add_message(session_id, "user", query)
+
+    result_text, ai_response, advice = plan_response(query, session_id)
+    if advice is not None:
+        ai_response = chat_message(result_text, get_deepseek_advice(query, *advice, use_cache=use_cache))
     
     if session_id: db.add_message(session_id, "ai", ai_response)
     
     return jsonify({"result_text": result_text, "ai_message": ai_response})
 
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """
+    Server-sent events variant of /predict:
+    `result` (model output, sent immediately) -> `token`* (LLM advice as it arrives) -> `done`.
+    `done` carries the same ai_message /predict returns and stores (see chat_message()).
+    """
+    data = request.json
+    query = data.get('query', '').lower()
+    session_id = data.get('session_id')
+    use_cache = not data.get('no_cache', False)
+
+    if session_id:
+        db.add_message(session_id, "user", query)
+
+    result_text, ai_response, advice = plan_response(query, session_id)
+
+    def events():
+        yield sse_event('result', {"result_text": result_text})
+
+        message = ai_response
+        if advice is not None:
+            parts = []
+            for token in stream_deepseek_advice(query, *advice, use_cache=use_cache):
+                parts.append(token)
+                yield sse_event('token', {"text": token})
+            message = chat_message(result_text, "".join(parts))
+
+        if session_id: db.add_message(session_id, "ai", message)
+        yield sse_event('done', {"result_text": result_text, "ai_message": message})
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
     print("-------------------------------------------------------")
     print(" SYSTEM STARTUP ")
@@ -389,4 +592,12 @@ if __name__ == '__main__':
     print(" SYSTEM READY: Debug Logs Restored ")
     print(" Listening on http://0.0.0.0:5000")
     print("-------------------------------------------------------")
-    serve(app, host='0.0.0.0', port=5000, threads=6)
\ No newline at end of file
+    if SERVE_WORKERS > 1:
+        # Finish every background load before forking so workers inherit it
+        engine.wait_for_surface()
+        serve_prefork(app, host='0.0.0.0', port=5000, workers=SERVE_WORKERS, threads=SERVE_THREADS,
+                      on_worker_exit=db.flush_messages)
+    else:
+        # Exit normally on SIGTERM so queued messages are flushed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        serve(app, host='0.0.0.0', port=5000, threads=SERVE_THREADS)
\ No newline at end of file
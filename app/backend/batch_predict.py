@@ -0,0 +1,100 @@
+import io
+import numpy as np
+import pandas as pd
+
+BATCH_COLUMNS = ['crop', 'province', 'planting_date']
+
+# Rows scored and serialized per step, so the first results leave before the last are scored
+CHUNK_ROWS = 10000
+
+ARROW_TYPES = ('application/vnd.apache.arrow.file', 'application/vnd.apache.arrow.stream')
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+def read_arrow(raw):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError("Arrow uploads need pyarrow (pip install pyarrow)")
+    try:
+        table = pa.ipc.open_file(pa.BufferReader(raw)).read_all()
+    except pa.ArrowInvalid:
+        table = pa.ipc.open_stream(pa.BufferReader(raw)).read_all()
+    return table.to_pandas()
+
+def read_batch(req):
+    """
+    Parses a batch request into a DataFrame with BATCH_COLUMNS. Accepts a JSON array
+    (of objects or [crop, province, planting_date] triples, optionally as {"rows": [...]}),
+    a CSV or Arrow IPC body, or the same as a multipart upload in the `file` field.
+    Raises ValueError with a client-facing message.
+    """
+    upload = req.files.get('file')
+    if upload is not None:
+        name, raw = (upload.filename or '').lower(), upload.read()
+        frame = read_arrow(raw) if name.endswith(ARROW_EXTENSIONS) else pd.read_csv(io.BytesIO(raw))
+    elif req.mimetype in ARROW_TYPES:
+        frame = read_arrow(req.get_data())
+    elif req.mimetype == 'text/csv':
+        frame = pd.read_csv(io.BytesIO(req.get_data()))
+    else:
+        payload = req.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get('rows')
+        if not isinstance(payload, list):
+            raise ValueError("Expected a JSON array of rows, or a CSV/Arrow upload")
+        if payload and not isinstance(payload[0], dict):
+            payload = [dict(zip(BATCH_COLUMNS, row)) for row in payload]
+        frame = pd.DataFrame(payload, columns=BATCH_COLUMNS)
+
+    frame.columns = [str(col).strip().lower() for col in frame.columns]
+    missing = [col for col in BATCH_COLUMNS if col not in frame.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+    return frame[BATCH_COLUMNS].reset_index(drop=True)
+
+def score_chunk(engine, chunk, crop_names):
+    """
+    Adds `yield_ton_ha` and `error` columns to one chunk of requests. Rows with an unknown
+    crop or province (including a blank one) or an unreadable date get an error and no yield.
+    Dates are ISO 8601; anything else is read day first (12/03/2025 is 12 March 2025).
+    """
+    crops = chunk['crop'].astype(str).str.strip().str.lower().map(crop_names)
+    provinces = chunk['province'].map(engine.normalize_province)
+    known_province = provinces.isin(engine.province_index.keys())
+    dates = pd.to_datetime(chunk['planting_date'], errors='coerce', format='ISO8601')
+    retry = dates.isna() & chunk['planting_date'].notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(chunk['planting_date'][retry].astype(str), errors='coerce',
+                                      format='mixed', dayfirst=True)
+
+    result = pd.DataFrame({
+        'crop': chunk['crop'],
+        'province': chunk['province'],
+        'planting_date': dates.dt.strftime('%Y-%m-%d'),
+        'yield_ton_ha': np.nan,
+        'error': None
+    })
+    result.loc[dates.isna(), 'error'] = "invalid planting_date"
+    result.loc[~known_province, 'error'] = "unknown province"
+    result.loc[crops.isna(), 'error'] = "unknown crop"
+
+    valid = (crops.notna() & known_province & dates.notna()).to_numpy()
+    if valid.any():
+        result.loc[valid, 'crop'] = crops[valid]
+        result.loc[valid, 'yield_ton_ha'] = engine.predict_rows(
+            crops[valid].to_numpy(), provinces[valid].to_numpy(), pd.DatetimeIndex(dates[valid])
+        )
+    return result
+
+def iter_results(engine, frame, fmt='ndjson', chunk_rows=CHUNK_ROWS):
+    """Yields the scored batch as NDJSON lines or CSV text, one chunk at a time."""
+    # Crop names are matched case-insensitively
+    crop_names = {crop.lower(): crop for crop in engine.duration_lookup.keys()}
+
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows]
+        result = score_chunk(engine, chunk, crop_names)
+        if fmt == 'csv':
+            yield result.to_csv(index=False, header=(start == 0))
+        elif len(result):
+            yield result.to_json(orient='records', lines=True).rstrip('\n') + '\n'
@@ -0,0 +1,108 @@
+import io
+import re
+import time
+import contextlib
+import difflib
+import numpy as np
+
+# Per-query latency of the compiled EntityIndex vs the old linear scans in extract_entities,
+# plus how many misspelled city names each one still resolves.
+# Run from app/backend (importing app loads the engine, so it needs the model artifacts):
+#   python benchmark_entities.py
+
+import app
+
+N_QUERIES = 2000
+
+def legacy_extract_entities(text):
+    """The pre-index extract_entities: substring scan over cities, then provinces, then one regex per crop alias."""
+    if not text: return None, None
+    clean_text = re.sub(r'[^\w\s]', ' ', text.lower())
+    found_crop, found_prov = None, None
+
+    for city, prov in app.CITY_TO_PROVINCE.items():
+        if city in clean_text:
+            found_prov = prov
+            print(f"DEBUG: Mapped City '{city}' to Province '{prov}'")
+            break
+    if not found_prov:
+        for prov in app.engine.soil_lookup.keys():
+            if prov.lower() in clean_text:
+                found_prov = prov
+                break
+
+    all_aliases = sorted(app.CROP_ALIASES.keys(), key=len, reverse=True)
+    for alias in all_aliases:
+        if re.search(r'\b' + re.escape(alias) + r'\b', clean_text):
+            found_crop = app.CROP_ALIASES[alias]
+            break
+
+    if not found_crop:
+        for word in clean_text.split():
+            if len(word) < 3 or word in app.STOPWORDS: continue
+            matches = difflib.get_close_matches(word, all_aliases, n=1, cutoff=0.8)
+            if matches:
+                found_crop = app.CROP_ALIASES[matches[0]]
+                print(f"DEBUG: Fuzzy Matched Typo '{word}' -> '{matches[0]}'")
+                break
+    return found_crop, found_prov
+
+def misspell(word, rng):
+    """One random typo: drop, swap or replace a letter."""
+    i = int(rng.integers(1, len(word) - 1))
+    op = rng.integers(3)
+    if op == 0: return word[:i] + word[i + 1:]
+    if op == 1: return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+    return word[:i] + 'aiueo'[rng.integers(5)] + word[i + 1:]
+
+def time_per_query(fn, queries):
+    # Both paths print DEBUG lines; keep them off the terminal
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        results = [fn(q) for q in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e6, results
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    cities = list(app.CITY_TO_PROVINCE.keys())
+    provinces = list(app.engine.soil_lookup.keys())
+    crops = list(app.CROP_ALIASES.keys())
+    templates = [
+        "Kapan waktu terbaik menanam {crop} di {place}?",
+        "berapa hasil panen {crop} kalau tanam di {place} bulan depan",
+        "Tolong prediksi {crop} untuk daerah {place} tanggal 12 Maret 2025",
+        "rekomendasi tanam di {place} dong",
+    ]
+    queries = []
+    for _ in range(N_QUERIES):
+        places = cities if rng.random() < 0.7 else provinces
+        queries.append(templates[rng.integers(len(templates))].format(
+            crop=crops[rng.integers(len(crops))], place=places[rng.integers(len(places))]))
+
+    # Warm-up both paths
+    time_per_query(legacy_extract_entities, queries[:1])
+    time_per_query(app.extract_entities, queries[:1])
+
+    legacy_us, legacy_res = time_per_query(legacy_extract_entities, queries)
+    fast_us, fast_res = time_per_query(app.extract_entities, queries)
+
+    agree = sum(a == b for a, b in zip(legacy_res, fast_res))
+    print(f"Queries parsed:           {N_QUERIES}")
+    print(f"Aliases indexed:          {len(app.ENTITY_INDEX.entries)}")
+    print(f"Linear scans:             {legacy_us:8.1f} us/query")
+    print(f"Compiled EntityIndex:     {fast_us:8.1f} us/query")
+    print(f"Speedup:                  {legacy_us / fast_us:8.1f}x")
+    # Differences are the old substring false positives (e.g. 'sumedang' contains 'medan')
+    print(f"Same (crop, province):    {agree}/{N_QUERIES}")
+
+    # Misspelled place names: only the new path has typo matching for locations
+    long_cities = [c for c in cities if len(c) >= 6]
+    typos = [long_cities[rng.integers(len(long_cities))] for _ in range(N_QUERIES // 4)]
+    typo_queries = [f"kapan tanam padi di {misspell(c, rng)}" for c in typos]
+    legacy_us, legacy_res = time_per_query(legacy_extract_entities, typo_queries)
+    fast_us, fast_res = time_per_query(app.extract_entities, typo_queries)
+    legacy_ok = sum(r[1] == app.CITY_TO_PROVINCE[c] for r, c in zip(legacy_res, typos))
+    fast_ok = sum(r[1] == app.CITY_TO_PROVINCE[c] for r, c in zip(fast_res, typos))
+    print(f"Misspelled city queries:  {len(typos)}")
+    print(f"Linear scans:             {legacy_us:8.1f} us/query, {legacy_ok} resolved")
+    print(f"Compiled EntityIndex:     {fast_us:8.1f} us/query, {fast_ok} resolved")
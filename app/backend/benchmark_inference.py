@@ -0,0 +1,58 @@
+import time
+import numpy as np
+import pandas as pd
+from prediction_engine import CropPredictor
+
+# Per-row latency of the booster in-place path vs the old DataFrame + XGBRegressor.predict path.
+# Run from app/backend (needs final_training_data.csv and the model artifacts):
+#   python benchmark_inference.py
+
+N_ROWS = 500
+
+def legacy_predict(engine, crop, prov_norm, planting_date):
+    """The pre-backend predict_yield_internal: dict -> one-row DataFrame -> model.predict."""
+    dense = engine.build_dense_features(
+        prov_norm, np.array([planting_date.month]), np.array([planting_date.day]),
+        engine.duration_lookup.get(crop, 90.0)
+    )
+    data_dict = {col: 0.0 for col in engine.model_columns}
+    for col, val in dense.items():
+        if col in data_dict: data_dict[col] = float(np.asarray(val).ravel()[0])
+    if f"Crop_{crop}" in data_dict: data_dict[f"Crop_{crop}"] = 1.0
+    if f"Province_{prov_norm}" in data_dict: data_dict[f"Province_{prov_norm}"] = 1.0
+
+    model_df = pd.DataFrame([data_dict]).astype(float)
+    log_pred = engine.model.predict(model_df)[0]
+    return float(max(0, np.expm1(log_pred)))
+
+def time_per_row(fn, queries):
+    start = time.perf_counter()
+    results = [fn(*q) for q in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e6, results
+
+if __name__ == '__main__':
+    # Surface lookups would bypass the model entirely; benchmark the model path itself
+    engine = CropPredictor(precompute_surface=False)
+
+    rng = np.random.default_rng(0)
+    crops = list(engine.duration_lookup.keys())
+    provinces = list(engine.province_index.keys())
+    dates = pd.date_range(pd.Timestamp.now().normalize(), periods=365, freq='D')
+    queries = [
+        (crops[rng.integers(len(crops))], provinces[rng.integers(len(provinces))], dates[rng.integers(len(dates))])
+        for _ in range(N_ROWS)
+    ]
+
+    # Warm-up both paths
+    legacy_predict(engine, *queries[0])
+    engine.predict_yield_internal(*queries[0])
+
+    legacy_us, legacy_res = time_per_row(lambda c, p, d: legacy_predict(engine, c, p, d), queries)
+    fast_us, fast_res = time_per_row(engine.predict_yield_internal, queries)
+
+    max_diff = float(np.max(np.abs(np.array(legacy_res) - np.array(fast_res))))
+    print(f"Rows scored:              {N_ROWS}")
+    print(f"DataFrame + predict():    {legacy_us:8.1f} us/row")
+    print(f"Booster inplace_predict:  {fast_us:8.1f} us/row")
+    print(f"Speedup:                  {legacy_us / fast_us:8.1f}x")
+    print(f"Max |difference|:         {max_diff:.2e} Ton/Ha")
@@ -1,13 +1,37 @@
 import sqlite3
 import datetime
+import threading
+import queue
+import atexit
 import uuid
 import os
 
 DB_NAME = "chat_history.db"
 
-def get_db_connection():
-    conn = sqlite3.connect(DB_NAME)
+# Bumped by every migration in migrate(); stored in PRAGMA user_version
+SCHEMA_VERSION = 3
+
+# One long-lived connection per thread (and per process, for pre-fork workers).
+# sqlite3 keeps a per-connection cache of prepared statements, so reusing the
+# connection also reuses the compiled SQL below.
+_local = threading.local()
+
+def open_connection():
+    conn = sqlite3.connect(DB_NAME, timeout=10, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    # WAL: readers never block the writer and commits append to the log instead of
+    # rewriting pages; NORMAL only fsyncs at checkpoints, which is safe under WAL.
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=10000')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+def get_db_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'pid', None) != os.getpid():
+        conn = _local.conn = open_connection()
+        _local.pid = os.getpid()
     return conn
 
 def init_db():
@@ -36,40 +60,169 @@ def init_db():
     ''')
     
     conn.commit()
-    conn.close()
+    migrate(conn)
     print(f"Database {DB_NAME} initialized.")
 
+def migrate(conn):
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    
+    if version < 1:
+        # Keyset pagination + per-session lookups/deletes without full table scans
+        with conn:
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_messages_session_id ON messages (session_id, id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions (created_at, id)')
+    
+    if version < 2:
+        # Per-session conversational memory (last crop/province mentioned)
+        with conn:
+            conn.execute('ALTER TABLE sessions ADD COLUMN memory_crop TEXT')
+            conn.execute('ALTER TABLE sessions ADD COLUMN memory_province TEXT')
+    
+    if version < 3:
+        # Bumped on every memory write, so workers can update it with compare-and-set
+        with conn:
+            conn.execute('ALTER TABLE sessions ADD COLUMN memory_version INTEGER NOT NULL DEFAULT 0')
+    
+    if version < SCHEMA_VERSION:
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        print(f"Database {DB_NAME} migrated to schema v{SCHEMA_VERSION}.")
+
 def create_session(title="New Chat"):
     session_id = str(uuid.uuid4())
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('INSERT INTO sessions (id, title, created_at) VALUES (?, ?, ?)', 
-              (session_id, title, datetime.datetime.now()))
-    conn.commit()
-    conn.close()
+    # `with conn` commits, or rolls back so the shared connection is never left mid-transaction
+    with conn:
+        conn.execute('INSERT INTO sessions (id, title, created_at) VALUES (?, ?, ?)', 
+                     (session_id, title, datetime.datetime.now()))
     return session_id
 
+def write_messages(conn, batch):
+    """Inserts (session_id, role, content, created_at) rows in order, in one transaction."""
+    with conn:
+        for session_id, role, content, created_at in batch:
+            conn.execute('INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)',
+                         (session_id, role, content, created_at))
+            
+            # Auto-update title if it's the first user message (title is still default)
+            if role == 'user':
+                new_title = content[:50] + "..." if len(content) > 50 else content
+                conn.execute('UPDATE sessions SET title = ? WHERE id = ? AND title = ?', 
+                             (new_title, session_id, 'New Chat'))
+
+class MessageWriter:
+    """
+    Write-behind queue for chat messages. Requests only enqueue; one background
+    thread drains the queue and commits up to `batch_size` messages per transaction.
+    A single FIFO and a single writer keep every session's messages in order.
+    """
+    def __init__(self, batch_size=200):
+        self.batch_size = batch_size
+        self.queue = queue.Queue()
+        self.pid = None
+        self.thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        # Threads don't survive fork, so each process starts its own writer on first use
+        with self._lock:
+            if self.pid != os.getpid():
+                self.queue = queue.Queue()
+                self.thread = threading.Thread(target=self.run, name='message-writer', daemon=True)
+                self.pid = os.getpid()
+                self.thread.start()
+
+    def submit(self, session_id, role, content):
+        self.ensure_started()
+        self.queue.put((session_id, role, content, datetime.datetime.now()))
+
+    def depth(self):
+        return self.queue.qsize() if self.pid == os.getpid() else 0
+
+    def run(self):
+        conn = open_connection()
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            batch = []
+            # Drain whatever is already waiting, up to one batch
+            while True:
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    write_messages(conn, batch)
+                except Exception as e:
+                    print(f"Message writer failed to store {len(batch)} messages: {e}")
+        conn.close()
+
+    def stop(self, timeout=10):
+        """Flushes everything queued so far and stops the writer thread."""
+        if self.thread is not None and self.pid == os.getpid() and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+            self.pid = None
+
+_writer = None
+
+def enable_write_behind(batch_size=200):
+    """Switches add_message to the write-behind queue (flushed at exit)."""
+    global _writer
+    if _writer is None:
+        _writer = MessageWriter(batch_size)
+        atexit.register(flush_messages)
+
+def flush_messages():
+    if _writer is not None:
+        _writer.stop()
+
+def pending_messages():
+    return _writer.depth() if _writer is not None else 0
+
 def add_message(session_id, role, content):
+    if _writer is not None:
+        _writer.submit(session_id, role, content)
+        return
+    write_messages(get_db_connection(), [(session_id, role, content, datetime.datetime.now())])
+
+def get_session_memory(session_id):
+    """Returns {"crop", "province", "version"} remembered for a session, or None if it doesn't exist."""
     conn = get_db_connection()
-    c = conn.cursor()
-    c.execute('INSERT INTO messages (session_id, role, content, created_at) VALUES (?, ?, ?, ?)',
-              (session_id, role, content, datetime.datetime.now()))
-    
-    # Auto-update title if it's the first user message (title is still default)
-    if role == 'user':
-        new_title = content[:50] + "..." if len(content) > 50 else content
-        c.execute('UPDATE sessions SET title = ? WHERE id = ? AND title = ?', 
-                  (new_title, session_id, 'New Chat'))
-    
-    conn.commit()
-    conn.close()
+    row = conn.execute('SELECT memory_crop, memory_province, memory_version FROM sessions WHERE id = ?',
+                       (session_id,)).fetchone()
+    if row is None: return None
+    return {"crop": row['memory_crop'], "province": row['memory_province'], "version": row['memory_version']}
+
+def save_session_memory(session_id, crop, province, version=None):
+    """
+    Writes a session's memory and returns its new version. With `version` (as read by
+    get_session_memory) this is a compare-and-set: nothing is written, and None is
+    returned, if another writer changed the memory since (or the session is gone).
+    """
+    conn = get_db_connection()
+    sql = ('UPDATE sessions SET memory_crop = ?, memory_province = ?, memory_version = memory_version + 1 '
+           'WHERE id = ?')
+    params = [crop, province, session_id]
+    if version is not None:
+        sql += ' AND memory_version = ?'
+        params.append(version)
+    with conn:
+        if conn.execute(sql, params).rowcount == 0: return None
+        # Same transaction as the UPDATE, so this is the version it wrote
+        return conn.execute('SELECT memory_version FROM sessions WHERE id = ?', (session_id,)).fetchone()[0]
 
 def get_sessions():
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute('SELECT * FROM sessions ORDER BY created_at DESC')
+    c.execute('SELECT id, title, created_at FROM sessions ORDER BY created_at DESC')
     rows = c.fetchall()
-    conn.close()
     return [dict(row) for row in rows]
 
 def get_messages(session_id):
@@ -77,14 +230,67 @@ def get_messages(session_id):
     c = conn.cursor()
     c.execute('SELECT role, content FROM messages WHERE session_id = ? ORDER BY id ASC', (session_id,))
     rows = c.fetchall()
-    conn.close()
     return [dict(row) for row in rows]
 
+def parse_sessions_cursor(cursor):
+    """Validates a get_sessions_page() cursor ("<created_at>|<id>"); returns (created_at, id)."""
+    created_at, _, last_id = cursor.rpartition('|')
+    try:
+        datetime.datetime.fromisoformat(created_at)
+        uuid.UUID(last_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor {cursor!r}: expected '<created_at>|<session id>'")
+    return created_at, last_id
+
+def parse_messages_cursor(cursor):
+    """Validates a get_messages_page() cursor (a message id); returns it as an int."""
+    try:
+        return int(cursor)
+    except ValueError:
+        raise ValueError(f"Invalid cursor {cursor!r}: expected a message id")
+
+def get_sessions_page(limit=50, cursor=None):
+    """
+    Newest-first page of sessions. `cursor` is the `next_cursor` of the previous page
+    ("<created_at>|<id>" of its last row, as parsed by parse_sessions_cursor()); the next
+    page starts right after that row.
+    """
+    conn = get_db_connection()
+    if cursor:
+        created_at, last_id = cursor
+        rows = conn.execute('SELECT id, title, created_at FROM sessions WHERE (created_at, id) < (?, ?) '
+                            'ORDER BY created_at DESC, id DESC LIMIT ?',
+                            (created_at, last_id, limit + 1)).fetchall()
+    else:
+        rows = conn.execute('SELECT id, title, created_at FROM sessions ORDER BY created_at DESC, id DESC LIMIT ?',
+                            (limit + 1,)).fetchall()
+
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = f"{items[-1]['created_at']}|{items[-1]['id']}" if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+def get_messages_page(session_id, limit=100, cursor=None):
+    """
+    The latest `limit` messages of a session, oldest first. `cursor` is the `next_cursor`
+    of the previous page (the id of its oldest message, as parsed by parse_messages_cursor());
+    the next page holds older messages.
+    """
+    conn = get_db_connection()
+    if cursor is not None:
+        rows = conn.execute('SELECT id, role, content FROM messages WHERE session_id = ? AND id < ? '
+                            'ORDER BY id DESC LIMIT ?', (session_id, cursor, limit + 1)).fetchall()
+    else:
+        rows = conn.execute('SELECT id, role, content FROM messages WHERE session_id = ? '
+                            'ORDER BY id DESC LIMIT ?', (session_id, limit + 1)).fetchall()
+
+    page = rows[:limit]
+    next_cursor = str(page[-1]['id']) if len(rows) > limit else None
+    items = [{"role": row['role'], "content": row['content']} for row in reversed(page)]
+    return {"items": items, "next_cursor": next_cursor}
+
 def delete_session(session_id):
     conn = get_db_connection()
-    c = conn.cursor()
-    # Cascading delete: messages first, then session
-    c.execute('DELETE FROM messages WHERE session_id = ?', (session_id,))
-    c.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
-    conn.commit()
-    conn.close()
+    with conn:
+        # Cascading delete: messages first, then session
+        conn.execute('DELETE FROM messages WHERE session_id = ?', (session_id,))
+        conn.execute('DELETE FROM sessions WHERE id = ?', (session_id,))
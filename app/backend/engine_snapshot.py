@@ -0,0 +1,43 @@
+import os
+import hashlib
+import joblib
+
+SNAPSHOT_FILE = 'engine_snapshot.joblib'
+
+# Bump when the layout of the derived tables changes, so old snapshots are rebuilt
+# (2: lookups learned from the compact float32 / categorical training frame)
+SNAPSHOT_VERSION = 2
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents (hashing is far cheaper than parsing the CSV)."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_snapshot(source_hash, path=SNAPSHOT_FILE):
+    """
+    Returns the stored tables if they were built from the same source data, else None.
+    NumPy arrays come back as read-only memory maps, so every process that loads the
+    same snapshot shares one copy of them through the page cache.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        snapshot = joblib.load(path, mmap_mode='r')
+    except Exception as e:
+        print(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        print(f"Ignoring snapshot {path} from layout v{snapshot.get('version')} (now v{SNAPSHOT_VERSION}).")
+        return None
+    if snapshot.get('source_hash') != source_hash:
+        return None
+    return snapshot['tables']
+
+def save_snapshot(tables, source_hash, path=SNAPSHOT_FILE):
+    # Write then swap, so a crashed or concurrent startup never reads a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump({'version': SNAPSHOT_VERSION, 'source_hash': source_hash, 'tables': tables}, tmp_path)
+    os.replace(tmp_path, path)
@@ -0,0 +1,220 @@
+import re
+import difflib
+
+CITY, PROVINCE, CROP = 'city', 'province', 'crop'
+
+# Typo matching: shortest word (and alias) worth correcting per kind (short place names sit
+# within a typo of everyday words: "musim" -> "musi", "belum" -> "belu", "baru" -> "aru"),
+# and the similarity a candidate within edit distance must still reach. Places are stricter
+# than crops (0.8 was the old difflib cutoff), must keep their first letter ("ladang" ->
+# "padang") and are only corrected right after a LOCATION_CUES word ("di semarrang", not
+# "sekarang"), since a wrong place also replaces the province remembered for the session.
+FUZZY_MIN_LENGTH = {CROP: 3, CITY: 5, PROVINCE: 5}
+FUZZY_CUTOFF = {CROP: 0.8, CITY: 0.85, PROVINCE: 0.85}
+PLACE_KINDS = {CITY, PROVINCE}
+LOCATION_CUES = {'di', 'ke', 'dari', 'daerah', 'kota', 'kabupaten', 'kab', 'provinsi', 'wilayah', 'sekitar', 'lokasi'}
+
+def edit_distance(a, b):
+    """
+    Optimal string alignment distance: insert, delete, substitute or swap two adjacent
+    letters, each costing 1 (so "jgaung" is one typo away from "jagung").
+    """
+    if len(a) < len(b): a, b = b, a
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        before, previous = previous, current
+    return previous[-1]
+
+def crop_aliases(crop_names):
+    """alias -> crop name: each crop lower-cased, plus every part of slash names ("laos/lengkuas")."""
+    aliases = {}
+    for crop in crop_names:
+        clean = crop.lower().strip()
+        aliases[clean] = crop
+        if '/' in clean:
+            for part in clean.split('/'):
+                aliases[part.strip()] = crop
+    return aliases
+
+# Deletion neighbourhoods are indexed this deep, which caps the typos per lookup
+MAX_TYPOS = 2
+
+def max_typos(word):
+    """Edits tolerated in a word: 1 up to 7 letters, 2 from 8 letters on."""
+    return min(MAX_TYPOS, max(1, len(word) // 4))
+
+def deletions(word, depth):
+    """`word` plus every string reachable by deleting up to `depth` characters."""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+class TypoIndex:
+    """
+    Deletion-neighbourhood index (as in SymSpell). Two words within k edits (swaps
+    included) always share a string obtained by deleting at most k characters from each, so a lookup
+    only hashes the query's own deletions and checks the few aliases they hit;
+    its cost depends on the query length, not on how many aliases are indexed.
+    """
+    def __init__(self, words=(), depth=MAX_TYPOS):
+        self.depth = depth
+        self.index = {}
+        for word in words:
+            for variant in deletions(word, depth):
+                self.index.setdefault(variant, set()).add(word)
+
+    def search(self, word, radius):
+        """Returns [(distance, word)] for every indexed word within `radius` edits."""
+        radius = min(radius, self.depth)
+        candidates = set()
+        for variant in deletions(word, radius):
+            candidates |= self.index.get(variant, set())
+        found = []
+        for candidate in candidates:
+            if abs(len(candidate) - len(word)) > radius: continue
+            d = edit_distance(word, candidate)
+            if d <= radius:
+                found.append((d, candidate))
+        return found
+
+def trie_pattern(words):
+    """
+    Regex source matching any of `words`, factored into a prefix trie
+    ("jawa barat|jawa timur" -> "jawa\\s+(?:barat|timur)") so the regex engine
+    follows one branch per character instead of retrying every alias.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def emit(node):
+        branches = [(r'\s+' if ch == ' ' else re.escape(ch)) + emit(child)
+                    for ch, child in sorted(node.items()) if ch]
+        if not branches: return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A word ending here makes the rest optional; `?` is greedy, so the longest alias wins
+        return '(?:' + body + ')?' if '' in node else body
+
+    return emit(trie)
+
+def clean_alias(text):
+    """Normalizes an alias the same way chat text is cleaned (punctuation -> space)."""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', str(text).lower()).split())
+
+class EntityIndex:
+    """
+    Gazetteer of city, province and crop aliases compiled into one word-boundary
+    regex (a prefix trie, longest alias first), so a chat turn is scanned once no matter how
+    many aliases there are. When several aliases of a kind occur, the one with the
+    lowest rank wins: cities and provinces keep their table order, crops prefer the
+    longest alias. Typos are resolved through a TypoIndex over the same aliases.
+    """
+    def __init__(self, city_to_province, provinces, crop_aliases):
+        # alias -> {kind: (rank, value)}
+        self.entries = {}
+        for rank, (city, prov) in enumerate(city_to_province.items()):
+            self.add(CITY, city, prov, rank)
+        for rank, prov in enumerate(provinces):
+            self.add(PROVINCE, prov, prov, rank)
+
+        self.crop_aliases = sorted(crop_aliases.keys(), key=len, reverse=True)
+        for rank, alias in enumerate(self.crop_aliases):
+            self.add(CROP, alias, crop_aliases[alias], rank)
+
+        self.pattern = re.compile(r'\b(?:' + trie_pattern(self.entries) + r')\b')
+        self.fuzzy = TypoIndex(self.entries)
+        self.fuzzy_heads = TypoIndex({a.split()[0] for a in self.entries if ' ' in a}, depth=1)
+
+    def add(self, kind, alias, value, rank):
+        alias = clean_alias(alias)
+        if not alias: return
+        # Keep the first occurrence, as a linear scan over the table would
+        self.entries.setdefault(alias, {}).setdefault(kind, (rank, value))
+
+    def match(self, clean_text):
+        """Returns {kind: (alias, value)} for the best match of each kind in the text."""
+        best = {}
+        for m in self.pattern.finditer(clean_text):
+            alias = ' '.join(m.group(0).split())
+            for kind, (rank, value) in self.entries[alias].items():
+                if kind not in best or rank < best[kind][0]:
+                    best[kind] = (rank, alias, value)
+        return {kind: (alias, value) for kind, (_, alias, value) in best.items()}
+
+    def fuzzy_match(self, clean_text, kinds, skip=()):
+        """
+        Typo-tolerant lookup for the given kinds. Tries each word pair, then each word, in
+        text order; the first one within max_typos() edits of an alias (and at least
+        FUZZY_CUTOFF similar; see the place rules above) decides that kind.
+        Words in `skip` are never corrected. Returns {kind: (typo, alias, value)}.
+        """
+        words = clean_text.split()
+        best = {}
+        for i, word in enumerate(words):
+            if word in skip: continue
+            place_slot = i > 0 and words[i - 1] in LOCATION_CUES
+            phrases = [word]
+            # Only pair words up when this one could start a multi-word alias
+            if i + 1 < len(words) and self.fuzzy_heads.search(word, 1):
+                phrases.insert(0, f"{word} {words[i + 1]}")
+            for phrase in phrases:
+                wanted = [k for k in kinds if k not in best and len(phrase) >= FUZZY_MIN_LENGTH[k]
+                          and (place_slot or k not in PLACE_KINDS)]
+                if not wanted or phrase in self.entries: continue
+                hits = []
+                for d, alias in self.fuzzy.search(phrase, max_typos(phrase)):
+                    ratio = difflib.SequenceMatcher(None, phrase, alias).ratio()
+                    # Two swapped letters score low on ratio ("malnag") but are an unmistakable typo
+                    swapped = d == 1 and sorted(phrase) == sorted(alias)
+                    for kind, (rank, value) in self.entries[alias].items():
+                        if kind not in wanted or (ratio < FUZZY_CUTOFF[kind] and not swapped): continue
+                        if len(alias) < FUZZY_MIN_LENGTH[kind]: continue
+                        if kind in PLACE_KINDS and phrase[0] != alias[0]: continue
+                        hits.append((d, rank, kind, alias, value))
+                for d, rank, kind, alias, value in sorted(hits):
+                    best.setdefault(kind, (phrase, alias, value))
+            if len(best) == len(kinds): break
+        return best
+
+    def extract(self, clean_text, skip=()):
+        """
+        (crop, province, notes) for a cleaned chat turn: exact aliases first (a known city
+        beats a bare province name), then typo matches for whatever is still missing.
+        `notes` lists (kind, text, alias) for every city mapping and typo correction used.
+        """
+        found_crop, found_prov, notes = None, None, []
+        matches = self.match(clean_text)
+        if CITY in matches:
+            city, found_prov = matches[CITY]
+            notes.append((CITY, city, city))
+        elif PROVINCE in matches:
+            found_prov = matches[PROVINCE][1]
+        if CROP in matches:
+            found_crop = matches[CROP][1]
+
+        missing = ([CROP] if not found_crop else []) + ([CITY, PROVINCE] if not found_prov else [])
+        if missing:
+            typos = self.fuzzy_match(clean_text, missing, skip=skip)
+            for kind in (CROP, CITY, PROVINCE):
+                if kind not in typos: continue
+                word, alias, value = typos[kind]
+                if kind == CROP and not found_crop:
+                    found_crop = value
+                elif kind != CROP and not found_prov:
+                    found_prov = value
+                else:
+                    continue
+                notes.append((kind, word, alias))
+        return found_crop, found_prov, notes
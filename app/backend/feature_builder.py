@@ -0,0 +1,76 @@
+import threading
+import numpy as np
+import pandas as pd
+
+class FeatureMatrixBuilder:
+    """
+    Assembles model input matrices without building DataFrames.
+
+    One builder serves one column layout (the `model_columns` the model was trained on).
+    Every thread keeps its own float32 template per row count, so concurrent requests
+    never share a buffer and repeated requests never re-allocate one.
+    """
+    def __init__(self, model_columns):
+        self.columns = list(model_columns)
+        self.column_index = {col: i for i, col in enumerate(self.columns)}
+
+        # One-hot column positions, keyed by the raw category value
+        self.crop_index = {col[len('Crop_'):]: i for col, i in self.column_index.items() if col.startswith('Crop_')}
+        self.province_index = {col[len('Province_'):]: i for col, i in self.column_index.items() if col.startswith('Province_')}
+
+        self._local = threading.local()
+
+    def get_template(self, n_rows):
+        """Returns this thread's (buffer, one-hot columns set last time) for `n_rows` rows."""
+        templates = getattr(self._local, 'templates', None)
+        if templates is None:
+            templates = self._local.templates = {}
+        if n_rows not in templates:
+            templates[n_rows] = [np.zeros((n_rows, len(self.columns)), dtype=np.float32), []]
+        return templates[n_rows]
+
+    def build(self, n_rows, dense, crop, prov_norm):
+        """
+        Writes the dense feature columns and the two one-hot cells into the
+        thread-local template and returns it.
+        `dense` maps column name -> scalar or array of length `n_rows`.
+        The returned buffer is reused by the next call on the same thread.
+        """
+        template = self.get_template(n_rows)
+        matrix, hot_cols = template
+
+        # Clear the one-hot columns of the previous request
+        for idx in hot_cols:
+            matrix[:, idx] = 0.0
+
+        for col, values in dense.items():
+            idx = self.column_index.get(col)
+            if idx is not None:
+                matrix[:, idx] = values
+
+        hot_cols = [idx for idx in (self.crop_index.get(crop), self.province_index.get(prov_norm)) if idx is not None]
+        for idx in hot_cols:
+            matrix[:, idx] = 1.0
+        template[1] = hot_cols
+
+        return matrix
+
+    def build_rows(self, dense, crops, prov_norms):
+        """
+        Fresh matrix for rows that each have their own crop and province.
+        `dense` maps column name -> array of length n; `crops`/`prov_norms` are length-n arrays.
+        """
+        matrix = np.zeros((len(crops), len(self.columns)), dtype=np.float32)
+        for col, values in dense.items():
+            idx = self.column_index.get(col)
+            if idx is not None:
+                matrix[:, idx] = values
+
+        # Resolve each distinct category once, then scatter the one-hot cells
+        for index, values in ((self.crop_index, crops), (self.province_index, prov_norms)):
+            codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+            cols = np.array([index.get(v, -1) for v in uniques] + [-1], dtype=np.int64)[codes]
+            rows = np.flatnonzero(cols >= 0)
+            matrix[rows, cols[rows]] = 1.0
+
+        return matrix
@@ -0,0 +1,33 @@
+import numpy as np
+
+class TreeEnsembleBackend:
+    """
+    Scores raw feature rows straight through the XGBoost booster.
+
+    `XGBRegressor.predict` re-validates inputs and goes through the sklearn wrapper on
+    every call; `Booster.inplace_predict` reads the NumPy buffer directly, which is what
+    matters for the tiny batches the chat endpoint sends.
+    Models without a booster (any other sklearn regressor) fall back to `.predict`.
+    `n_threads` caps the booster's OpenMP threads; pre-fork workers use 1 so that no
+    thread pool exists when the parent forks.
+    """
+    def __init__(self, model, n_threads=None):
+        self.model = model
+        self.booster = model.get_booster() if hasattr(model, 'get_booster') else None
+        if self.booster is not None and n_threads is not None:
+            self.booster.set_param({'nthread': n_threads})
+
+        # Respect early stopping the same way XGBRegressor.predict does
+        try:
+            self.iteration_range = (0, model.best_iteration + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+
+    def predict_log(self, features):
+        """Returns the raw (log1p-space) model output for a 2D float32 array."""
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        if self.booster is not None:
+            return self.booster.inplace_predict(
+                features, iteration_range=self.iteration_range, validate_features=False
+            )
+        return self.model.predict(features)
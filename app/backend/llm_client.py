@@ -0,0 +1,179 @@
+import json
+import queue
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import requests
+from requests.adapters import HTTPAdapter
+
+class AdviceClient:
+    """
+    Chat-completions client with its own bounded worker pool.
+
+    At most `max_concurrency` upstream calls run at once over pooled keep-alive
+    connections, and at most `max_queue` more may wait for a slot. Anything beyond
+    that is rejected immediately, so slow upstream calls can only ever tie up
+    `max_concurrency + max_queue` server threads; the rest stay free for
+    model-only and session requests.
+    """
+    def __init__(self, url, api_key, model, max_concurrency=3, max_queue=2, timeout=30):
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='llm')
+        self.slots = threading.BoundedSemaphore(max_concurrency + max_queue)
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.started = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+
+    def headers(self):
+        return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+
+    def payload(self, prompt, temperature=0.6, stream=False):
+        payload = {"model": self.model, "messages": [{"role": "user", "content": prompt}], "temperature": temperature}
+        if stream: payload["stream"] = True
+        return payload
+
+    def mark_started(self, enqueued_at):
+        queued = time.perf_counter() - enqueued_at
+        with self._lock:
+            self.started += 1
+            self.in_flight += 1
+            self.queue_time_total += queued
+            self.queue_time_max = max(self.queue_time_max, queued)
+
+    def acquire_slot(self):
+        if not self.api_key:
+            raise RuntimeError("DEEPSEEK_API_KEY is not set; LLM advice is disabled")
+        if not self.slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise RuntimeError("LLM advice pool is full")
+        with self._lock:
+            self.submitted += 1
+
+    def post_chat(self, prompt, enqueued_at):
+        self.mark_started(enqueued_at)
+
+        try:
+            response = self.session.post(self.url, json=self.payload(prompt), headers=self.headers(), timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        with self._lock:
+            self.completed += 1
+        if 'choices' in data: return data['choices'][0]['message']['content']
+        return None
+
+    def complete(self, prompt):
+        """
+        Runs one chat completion on the advice pool and waits for it.
+        Returns the message content (None if upstream sent no choices).
+        Raises RuntimeError when there is no API key or the pool is saturated, or the upstream error.
+        """
+        self.acquire_slot()
+        future = self.executor.submit(self.post_chat, prompt, time.perf_counter())
+        future.add_done_callback(lambda f: self.slots.release())
+
+        try:
+            # Queue wait + upstream timeout; the call itself is bounded by `timeout`
+            return future.result(timeout=self.timeout * 2)
+        except FutureTimeout:
+            with self._lock:
+                self.timed_out += 1
+            raise RuntimeError("LLM advice timed out waiting for a slot")
+
+    def stream_chat(self, prompt, enqueued_at, out):
+        """Pool task: reads the upstream SSE stream and pushes content deltas onto `out`."""
+        self.mark_started(enqueued_at)
+        try:
+            with self.session.post(self.url, json=self.payload(prompt, stream=True), headers=self.headers(),
+                                   timeout=self.timeout, stream=True) as response:
+                # An error page has no data: lines and would otherwise pass as an empty answer
+                response.raise_for_status()
+                response.encoding = 'utf-8'
+                for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    chunk = json.loads(data)
+                    choices = chunk.get('choices') or [{}]
+                    token = (choices[0].get('delta') or {}).get('content')
+                    if token: out.put(token)
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            out.put(e)
+        else:
+            with self._lock:
+                self.completed += 1
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            out.put(None)
+
+    def stream(self, prompt):
+        """
+        Generator over content tokens of one streamed chat completion. The upstream
+        read still runs on the advice pool, so the same concurrency limit applies.
+        Raises RuntimeError when there is no API key or the pool is saturated, or the upstream error.
+        """
+        self.acquire_slot()
+        out = queue.Queue()
+        future = self.executor.submit(self.stream_chat, prompt, time.perf_counter(), out)
+        future.add_done_callback(lambda f: self.slots.release())
+
+        while True:
+            try:
+                item = out.get(timeout=self.timeout * 2)
+            except queue.Empty:
+                with self._lock:
+                    self.timed_out += 1
+                raise RuntimeError("LLM advice stream stalled")
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_concurrency': self.max_concurrency,
+                'max_queue': self.max_queue,
+                'queued': self.submitted - self.started,
+                'in_flight': self.in_flight,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'failed': self.failed,
+                'timed_out': self.timed_out,
+                'avg_queue_ms': self.queue_time_total / self.started * 1000 if self.started else 0.0,
+                'max_queue_ms': self.queue_time_max * 1000
+            }
@@ -2,42 +2,166 @@ import pandas as pd
 import numpy as np
 import joblib
 import datetime
+import gc
+import os
+import sys
+from feature_builder import FeatureMatrixBuilder
+from inference import TreeEnsembleBackend
+from result_cache import DailyLRUCache
+from yield_surface import YieldSurfaceJob, source_fingerprint
+from engine_snapshot import file_hash, load_snapshot, save_snapshot
+
+DATA_FILE = 'final_training_data.csv'
+
+# Derived tables persisted in the engine snapshot
+SNAPSHOT_TABLES = ['soil_lookup', 'weather_lookup', 'duration_lookup', 'baseline_yields', 'feature_tensor', 'provinces']
+
+WEATHER_FEATURES = ['Avg_Temp', 'Total_Rainfall', 'Avg_Humidity', 'Avg_Soil_Moisture']
+SOIL_FEATURES = ['Soil_pH', 'Clay_Ratio', 'Sand_Ratio']
+TENSOR_FEATURES = WEATHER_FEATURES + SOIL_FEATURES
+
+# The only CSV columns the lookups need, in compact dtypes; nothing else is ever materialized
+LOOKUP_DTYPES = {'Crop': 'category', 'Province': 'category',
+                 **{col: 'float32' for col in WEATHER_FEATURES + SOIL_FEATURES + ['Target_Yield']}}
+LOOKUP_DATES = ['Planting_Date', 'Harvest_Date']
+
+DEFAULT_WEATHER = {'Avg_Temp': 28.0, 'Total_Rainfall': 1000.0, 'Avg_Humidity': 80.0, 'Avg_Soil_Moisture': 30.0}
+DEFAULT_SOIL = {'Soil_pH': 6.0, 'Clay_Ratio': 30.0, 'Sand_Ratio': 30.0}
+
+# Day-of-year slot for (month, day) on a leap calendar, so Feb 29 gets its own slot
+# and every other date maps to the same slot regardless of the year.
+LEAP_MONTH_OFFSETS = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+DAYS_PER_YEAR = 366
+SLOT_DATES = pd.date_range('2024-01-01', periods=DAYS_PER_YEAR, freq='D')
+
+# Distinct (crop, province) optimization answers kept per day
+OPTIMIZATION_CACHE_SIZE = 256
+
+def day_of_year_index(months, days):
+    return LEAP_MONTH_OFFSETS[np.asarray(months) - 1] + np.asarray(days) - 1
+
+def pick_windows(yields, top_k, min_gap, positions=None):
+    """
+    Indices of the `top_k` best yields whose positions (day offsets; default the
+    indices themselves) are at least `min_gap` apart, best first.
+    Ties resolve to the earliest position, like np.argmax.
+    """
+    positions = np.arange(len(yields)) if positions is None else np.asarray(positions)
+    picked = []
+    for i in np.argsort(-np.asarray(yields), kind='stable'):
+        if all(abs(positions[i] - positions[j]) >= min_gap for j in picked):
+            picked.append(i)
+            if len(picked) == top_k: break
+    return picked
+
+def deep_sizeof(obj):
+    """Approximate bytes held by a lookup table (nested dicts / lists of scalars, or an array)."""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k) + deep_sizeof(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(item) for item in obj)
+    return size
+
+def resident_set_size():
+    """This process's resident memory in bytes (current on Linux, peak elsewhere; None on Windows)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
 
 class CropPredictor:
-    def __init__(self):
+    def __init__(self, precompute_surface=True, n_threads=None):
         print("Loading knowledge from final training data...")
-        self.df = pd.read_csv('final_training_data.csv')
+        self.source_fingerprint = source_fingerprint()
         self.model = joblib.load('crop_yield_model.joblib')
         self.model_columns = joblib.load('model_columns.joblib')
+        self.feature_builder = FeatureMatrixBuilder(self.model_columns)
+        self.backend = TreeEnsembleBackend(self.model, n_threads)
 
-        # 1. Parse Dates Correctly
-        self.df['Planting_Date'] = pd.to_datetime(self.df['Planting_Date'])
-        self.df['Harvest_Date'] = pd.to_datetime(self.df['Harvest_Date'])
-        self.df['Month'] = self.df['Planting_Date'].dt.month
+        # 1-6. Lookups & Feature Tensor: from the snapshot if the CSV is unchanged
+        data_hash = file_hash(DATA_FILE)
+        tables = load_snapshot(data_hash)
+        if tables is not None:
+            print("Loaded lookups from snapshot.")
+            for name in SNAPSHOT_TABLES:
+                setattr(self, name, tables[name])
+            self.index_provinces()
+        else:
+            self.learn_lookups(DATA_FILE)
+            print("Precomputing daily weather & soil tensor...")
+            self.build_feature_tensor()
+            save_snapshot({name: getattr(self, name) for name in SNAPSHOT_TABLES}, data_hash)
+
+        # 7. Memoized 365-day optimizations (same answer for everyone on the same day)
+        self.optimization_cache = DailyLRUCache(OPTIMIZATION_CACHE_SIZE)
+
+        # 8. Precomputed Yield Surface (loaded/built in the background, live model until then)
+        self.yield_surface = None
+        self.surface_job = YieldSurfaceJob(self).start() if precompute_surface else None
+
+        rss = resident_set_size()
+        print(f"Engine Ready! ({rss / 1e6:.0f} MB resident)" if rss else "Engine Ready!")
+
+    def learn_lookups(self, path):
+        df = pd.read_csv(path, usecols=list(LOOKUP_DTYPES) + LOOKUP_DATES, dtype=LOOKUP_DTYPES)
+
+        # 1. Parse Dates Correctly (only the month and the duration are kept)
+        planting = pd.to_datetime(df.pop('Planting_Date'))
+        harvest = pd.to_datetime(df.pop('Harvest_Date'))
+        df['Month'] = planting.dt.month.astype('int8')
         
         # Calculate Duration
-        self.df['Duration_Days'] = (self.df['Harvest_Date'] - self.df['Planting_Date']).dt.days
+        df['Duration_Days'] = (harvest - planting).dt.days.astype('int16')
+        del planting, harvest
+        print(f"Training data: {len(df)} rows, {df.memory_usage(deep=True).sum() / 1e6:.1f} MB in memory.")
 
         # 2. Build Soil Lookup (Static per Province)
         print("Learning soil profiles...")
-        self.soil_lookup = self.df.groupby('Province')[
+        self.soil_lookup = df.groupby('Province', observed=True)[
             ['Soil_pH', 'Clay_Ratio', 'Sand_Ratio']
         ].mean().to_dict('index')
 
         # 3. Build Weather Lookup (Base Monthly Averages)
         # We still calculate monthly baselines, but we will INTERPOLATE between them later.
         print("Learning weather patterns...")
-        self.weather_lookup = self.df.groupby(['Province', 'Month'])[
+        self.weather_lookup = df.groupby(['Province', 'Month'], observed=True)[
             ['Avg_Temp', 'Total_Rainfall', 'Avg_Humidity', 'Avg_Soil_Moisture']
         ].mean().to_dict('index')
 
         # 4. Duration Lookup
-        self.duration_lookup = self.df.groupby('Crop')['Duration_Days'].mean().to_dict()
+        self.duration_lookup = df.groupby('Crop', observed=True)['Duration_Days'].mean().to_dict()
         
         # 5. Baseline Yields (For comparison)
-        self.baseline_yields = self.df.groupby(['Crop', 'Province'])['Target_Yield'].mean().to_dict()
+        self.baseline_yields = df.groupby(['Crop', 'Province'], observed=True)['Target_Yield'].mean().to_dict()
+
+        # Serving only needs the lookups above; drop the frame now rather than at the next collection
+        del df
+        gc.collect()
 
-        print("Engine Ready!")
+    def memory_footprint(self):
+        """Bytes held by each lookup table, the yield surface, and the process's resident size."""
+        tables = {name: deep_sizeof(getattr(self, name)) for name in SNAPSHOT_TABLES}
+        surface = self.yield_surface
+        return {
+            'tables_bytes': tables,
+            'yield_surface_bytes': surface.values.nbytes if surface is not None else 0,
+            'resident_bytes': resident_set_size()
+        }
+
+    def wait_for_surface(self, timeout=None):
+        """Blocks until the background surface job is done (e.g. before forking workers)."""
+        if self.surface_job is not None:
+            self.surface_job.thread.join(timeout)
 
     def normalize_province(self, prov):
         if pd.isna(prov): return ""
@@ -50,20 +174,50 @@ class CropPredictor:
             return float(self.baseline_yields[key])
         return 4.0
 
+    def build_feature_tensor(self):
+        """
+        Bakes the interpolated weather and the static soil profile of every province
+        into one dense array of shape (province, day-of-year, feature).
+        The last province row holds the defaults used for unknown provinces.
+        """
+        provinces = sorted(set(self.soil_lookup.keys()) | {p for p, _ in self.weather_lookup.keys()})
+        self.provinces = provinces + [None]
+        self.index_provinces()
+
+        tensor = np.empty((len(provinces) + 1, DAYS_PER_YEAR, len(TENSOR_FEATURES)))
+        for prov, p_idx in list(self.province_index.items()) + [(None, self.unknown_province_idx)]:
+            soil_stats = self.soil_lookup.get(prov, DEFAULT_SOIL)
+            for d_idx, d in enumerate(SLOT_DATES):
+                weather_stats = self.blend_weather(prov, d.month, d.day)
+                tensor[p_idx, d_idx, :4] = [weather_stats[k] for k in WEATHER_FEATURES]
+            tensor[p_idx, :, 4:] = [soil_stats[k] for k in SOIL_FEATURES]
+
+        self.feature_tensor = tensor
+
+    def index_provinces(self):
+        """Province -> tensor row. `self.provinces` ends with None, the unknown-province row."""
+        self.province_index = {prov: i for i, prov in enumerate(self.provinces[:-1])}
+        self.unknown_province_idx = len(self.provinces) - 1
+        self.slot_months = SLOT_DATES.month.values
+
+    def get_province_idx(self, province):
+        return self.province_index.get(self.normalize_province(province), self.unknown_province_idx)
+
     def get_interpolated_weather(self, province, date):
         """
         Smart Weather: Calculates weather for a SPECIFIC DAY by blending 
         the current month's average with the next/prev month.
         This prevents the 'Staircase Effect' where values stay flat for 30 days.
         """
-        prov_norm = self.normalize_province(province)
-        month = date.month
-        day = date.day
-        
+        day_idx = day_of_year_index(date.month, date.day)
+        row = self.feature_tensor[self.get_province_idx(province), day_idx]
+        return dict(zip(WEATHER_FEATURES, row[:4]))
+
+    def blend_weather(self, prov_norm, month, day):
         # Current Month Stats
         current_stats = self.weather_lookup.get((prov_norm, month), 
                         self.weather_lookup.get((prov_norm, 1), # Fallback to Jan
-                        {'Avg_Temp': 28.0, 'Total_Rainfall': 1000.0, 'Avg_Humidity': 80.0, 'Avg_Soil_Moisture': 30.0}))
+                        DEFAULT_WEATHER))
 
         # Determine target for interpolation (Next month if > 15th, Prev month if < 15th)
         # We assume the "Average" represents the 15th of the month.
@@ -80,7 +234,7 @@ class CropPredictor:
             
         # Perform Linear Interpolation
         blended_stats = {}
-        for key in ['Avg_Temp', 'Total_Rainfall', 'Avg_Humidity', 'Avg_Soil_Moisture']:
+        for key in WEATHER_FEATURES:
             val_curr = current_stats.get(key, 0.0)
             val_target = target_stats.get(key, 0.0)
             
@@ -89,42 +243,89 @@ class CropPredictor:
             
         return blended_stats
 
+    def build_dense_features(self, prov_norm, months, days, duration):
+        """
+        Dense (non one-hot) model features for one province over many planting days.
+        Weather & soil come from the tensor; the rest is derived from the crop duration.
+        """
+        features = self.feature_tensor[
+            self.province_index.get(prov_norm, self.unknown_province_idx),
+            day_of_year_index(months, days)
+        ]
+        return self.dense_from_tensor_rows(features, months, duration)
+
+    def dense_from_tensor_rows(self, features, months, duration):
+        dense = dict(zip(TENSOR_FEATURES, features.T))
+        dense.update({
+            'Planting_Month': months,
+            'Duration_Days': duration,
+            'Rain_Intensity': dense['Total_Rainfall'] / duration,
+            'Heat_Sum': dense['Avg_Temp'] * duration
+        })
+        return dense
+
+    def predict_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        Scores an (n_rows, len(model_columns)) feature matrix in one call.
+        Returns yields in Ton/Ha (log-transform reversed, clipped at 0).
+        """
+        log_preds = self.backend.predict_log(features)
+        return np.maximum(np.expm1(log_preds), 0)
+
     def predict_yield_internal(self, crop, province, planting_date):
         prov_norm = self.normalize_province(province)
-        month = planting_date.month
-        
-        # Get Soil (Static)
-        soil_stats = self.soil_lookup.get(prov_norm, {'Soil_pH': 6.0, 'Clay_Ratio': 30.0, 'Sand_Ratio': 30.0})
 
-        # Get Weather (DYNAMIC / INTERPOLATED)
-        weather_stats = self.get_interpolated_weather(province, planting_date)
+        # O(1) lookup when the precomputed surface covers this crop
+        if self.yield_surface is not None:
+            day_idx = day_of_year_index(planting_date.month, planting_date.day)
+            prov_idx = self.province_index.get(prov_norm, self.unknown_province_idx)
+            surface_yield = self.yield_surface.get(crop, prov_idx, day_idx)
+            if surface_yield is not None:
+                return float(surface_yield)
 
         duration = self.duration_lookup.get(crop, 90.0)
 
-        input_data = {
-            'Avg_Temp': weather_stats['Avg_Temp'],
-            'Total_Rainfall': weather_stats['Total_Rainfall'],
-            'Avg_Humidity': weather_stats['Avg_Humidity'],
-            'Avg_Soil_Moisture': weather_stats['Avg_Soil_Moisture'],
-            'Soil_pH': soil_stats['Soil_pH'],
-            'Clay_Ratio': soil_stats['Clay_Ratio'],
-            'Sand_Ratio': soil_stats['Sand_Ratio'],
-            'Planting_Month': month,
-            'Duration_Days': duration,
-            'Rain_Intensity': weather_stats['Total_Rainfall'] / duration,
-            'Heat_Sum': weather_stats['Avg_Temp'] * duration
-        }
-        
-        data_dict = {col: 0.0 for col in self.model_columns}
-        for col, val in input_data.items():
-            if col in data_dict: data_dict[col] = float(val)
-        
-        if f"Crop_{crop}" in data_dict: data_dict[f"Crop_{crop}"] = 1.0
-        if f"Province_{prov_norm}" in data_dict: data_dict[f"Province_{prov_norm}"] = 1.0
-            
-        model_df = pd.DataFrame([data_dict]).astype(float)
-        log_pred = self.model.predict(model_df)[0]
-        return float(max(0, np.expm1(log_pred)))
+        dense = self.build_dense_features(
+            prov_norm, np.array([planting_date.month]), np.array([planting_date.day]), duration
+        )
+        row = self.feature_builder.build(1, dense, crop, prov_norm)
+        return float(self.predict_batch(row)[0])
+
+    def predict_rows(self, crops, provinces, dates):
+        """
+        Vectorized predict_yield_internal over row-aligned arrays of crops, provinces
+        and planting dates (a DatetimeIndex). Rows covered by the yield surface are
+        gathered from it; the rest are scored in one model call.
+        """
+        # Resolve each distinct crop/province once (the -1 code of a missing value picks the last entry)
+        crop_codes, crop_uniques = pd.factorize(pd.Series(crops, dtype=object))
+        crop_uniques = list(crop_uniques) + [None]
+        prov_codes, prov_uniques = pd.factorize(pd.Series(provinces, dtype=object))
+        prov_uniques = [self.normalize_province(p) for p in prov_uniques] + [""]
+
+        crops = np.array(crop_uniques, dtype=object)[crop_codes]
+        prov_norm = np.array(prov_uniques, dtype=object)[prov_codes]
+        prov_idx = np.array([self.province_index.get(p, self.unknown_province_idx) for p in prov_uniques])[prov_codes]
+        months = np.asarray(dates.month)
+        day_idx = day_of_year_index(months, dates.day)
+
+        yields = np.empty(len(crops), dtype=np.float64)
+        todo = np.ones(len(crops), dtype=bool)
+
+        if self.yield_surface is not None:
+            crop_idx = np.array([self.yield_surface.crop_index.get(c, -1) for c in crop_uniques])[crop_codes]
+            todo = crop_idx < 0
+            hit = ~todo
+            yields[hit] = self.yield_surface.values[crop_idx[hit], prov_idx[hit], day_idx[hit]]
+
+        if todo.any():
+            durations = np.array([self.duration_lookup.get(c, 90.0) for c in crop_uniques])[crop_codes[todo]]
+            features = self.feature_tensor[prov_idx[todo], day_idx[todo]]
+            dense = self.dense_from_tensor_rows(features, months[todo], durations)
+            matrix = self.feature_builder.build_rows(dense, crops[todo], prov_norm[todo])
+            yields[todo] = self.predict_batch(matrix)
+
+        return yields
 
     def predict_yield(self, crop, province, planting_date_str):
         try:
@@ -136,67 +337,147 @@ class CropPredictor:
     def find_best_planting_time(self, crop, province):
         """
         VECTORIZED OPTIMIZATION (365 DAYS)
+        Results are memoized per (crop, province, start date) until midnight.
         """
         start_date = pd.Timestamp.now().normalize()
         prov_norm = self.normalize_province(province)
+
+        cache_key = (crop, prov_norm, start_date)
+        cached = self.optimization_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # 1. Generate 365 Dates
-        dates = [start_date + pd.Timedelta(days=i) for i in range(365)]
-        months = np.array([d.month for d in dates])
-        days = np.array([d.day for d in dates])
-        
-        # 2. Pre-fetch Weather & Soil (Batch)
-        soil_stats = self.soil_lookup.get(prov_norm, {'Soil_pH': 6.0, 'Clay_Ratio': 30.0, 'Sand_Ratio': 30.0})
+        dates = pd.date_range(start_date, periods=365, freq='D')
+        months = dates.month.values
         
-        # Optimize Weather Interpolation for 365 days
-        weather_daily = []
-        for d in dates:
-            weather_daily.append(self.get_interpolated_weather(province, d))
+        days = dates.day.values
+
+        # Precomputed surface: the sweep is just a gather over 365 day slots
+        yields = None
+        if self.yield_surface is not None:
+            prov_idx = self.province_index.get(prov_norm, self.unknown_province_idx)
+            yields = self.yield_surface.get(crop, prov_idx, day_of_year_index(months, days))
+
+        if yields is None:
+            # 2. Slice Weather & Soil for all 365 days at once
+            duration = self.duration_lookup.get(crop, 90.0)
+            data_batch = self.build_dense_features(prov_norm, months, days, duration)
             
-        weather_df = pd.DataFrame(weather_daily)
-        
-        # 3. Construct Batch DataFrame
-        duration = self.duration_lookup.get(crop, 90.0)
-        
-        # Create base dataframe with all features
-        data_batch = {
-            'Avg_Temp': weather_df['Avg_Temp'].values,
-            'Total_Rainfall': weather_df['Total_Rainfall'].values,
-            'Avg_Humidity': weather_df['Avg_Humidity'].values,
-            'Avg_Soil_Moisture': weather_df['Avg_Soil_Moisture'].values,
-            'Soil_pH': [soil_stats['Soil_pH']] * 365,
-            'Clay_Ratio': [soil_stats['Clay_Ratio']] * 365,
-            'Sand_Ratio': [soil_stats['Sand_Ratio']] * 365,
-            'Planting_Month': months,
-            'Duration_Days': [duration] * 365,
-            'Rain_Intensity': (weather_df['Total_Rainfall'] / duration).values,
-            'Heat_Sum': (weather_df['Avg_Temp'] * duration).values
-        }
-        
-        # Initialize full feature matrix with 0.0
-        batch_df = pd.DataFrame(0.0, index=range(365), columns=self.model_columns)
-        
-        # Fill in the dense features
-        for col, values in data_batch.items():
-            if col in batch_df.columns:
-                batch_df[col] = values
+            # 3. Construct Batch Feature Matrix
+            # Reuses this thread's preallocated 365 x N float32 matrix
+            batch_matrix = self.feature_builder.build(len(dates), data_batch, crop, prov_norm)
                 
-        # One-Hot Encoding
-        crop_col = f"Crop_{crop}"
-        prov_col = f"Province_{prov_norm}"
-        
-        if crop_col in batch_df.columns:
-            batch_df[crop_col] = 1.0
-        if prov_col in batch_df.columns:
-            batch_df[prov_col] = 1.0
-            
-        # 4. Batch Predict
-        log_preds = self.model.predict(batch_df)
-        yields = np.expm1(log_preds)
+            # 4. Batch Predict
+            yields = self.predict_batch(batch_matrix)
         
         # 5. Find Max
         best_idx = np.argmax(yields)
         best_yield = float(max(0, yields[best_idx]))
         best_date_str = dates[best_idx].strftime('%Y-%m-%d')
 
-        return best_date_str, best_yield
\ No newline at end of file
+        self.optimization_cache.put(cache_key, (best_date_str, best_yield))
+        return best_date_str, best_yield
+
+    def optimize_planting(self, crops=None, provinces=None, top_k=1, min_gap_days=30, horizon_days=365):
+        """
+        find_best_planting_time for every (crop, province) pair at once: all pairs x days
+        are scored in one predict_rows pass. Defaults to every crop / every known province.
+        With top_k > 1 each pair gets its k best dates, at least `min_gap_days` apart.
+        Returns a DataFrame ranked by yield (best pair first, then window rank).
+        """
+        start_date = pd.Timestamp.now().normalize()
+        crops = list(crops) if crops else sorted(self.duration_lookup.keys())
+        if provinces:
+            provinces = list(dict.fromkeys(self.normalize_province(p) for p in provinces))
+        else:
+            provinces = [p for p in self.provinces if p is not None]
+
+        dates = pd.date_range(start_date, periods=horizon_days, freq='D')
+        pair_crops = np.repeat(np.array(crops, dtype=object), len(provinces))
+        pair_provs = np.tile(np.array(provinces, dtype=object), len(crops))
+        n_pairs = len(pair_crops)
+
+        yields = self.predict_rows(
+            np.repeat(pair_crops, horizon_days),
+            np.repeat(pair_provs, horizon_days),
+            dates[np.tile(np.arange(horizon_days), n_pairs)]
+        ).reshape(n_pairs, horizon_days)
+
+        rows = []
+        for i in range(n_pairs):
+            picked = pick_windows(yields[i], top_k, min_gap_days)
+            baseline = self.get_baseline_yield(pair_crops[i], pair_provs[i])
+            for rank, day in enumerate(picked, 1):
+                best_yield = float(max(0, yields[i, day]))
+                rows.append({
+                    'crop': pair_crops[i],
+                    'province': pair_provs[i],
+                    'window_rank': rank,
+                    'planting_date': dates[day].strftime('%Y-%m-%d'),
+                    'yield_ton_ha': best_yield,
+                    'baseline_ton_ha': baseline,
+                    'gain_pct': (best_yield - baseline) / baseline * 100
+                })
+
+        table = pd.DataFrame(rows, columns=['crop', 'province', 'window_rank', 'planting_date',
+                                            'yield_ton_ha', 'baseline_ton_ha', 'gain_pct'])
+        if table.empty: return table
+        # Rank pairs by their best window, keep each pair's windows together
+        best = table.groupby(['crop', 'province'])['yield_ton_ha'].transform('max')
+        table = table.assign(_best=best).sort_values(
+            ['_best', 'crop', 'province', 'window_rank'], ascending=[False, True, True, True], kind='stable'
+        )
+        return table.drop(columns='_best').reset_index(drop=True)
+
+    def search_planting_windows(self, crop, province, start_date=None, horizon_days=365, step_days=7,
+                                top_k=3, min_gap_days=None):
+        """
+        Best planting dates for one crop/province over any horizon, coarse to fine:
+        every `step_days`-th day is scored first, then every day within one step of
+        the best coarse peaks. Multi-year horizons therefore cost about
+        horizon / step + a few dozen rows. Returns the `top_k` windows, at least
+        `min_gap_days` apart (default: the crop duration, so seasons don't overlap).
+        """
+        start = pd.Timestamp(start_date).normalize() if start_date else pd.Timestamp.now().normalize()
+        duration = self.duration_lookup.get(crop, 90.0)
+        if min_gap_days is None:
+            min_gap_days = max(1, int(round(duration)))
+        horizon_days = max(1, int(horizon_days))
+        step_days = max(1, min(int(step_days), horizon_days))
+
+        scored = {}  # day offset -> yield
+        def score(offsets):
+            if len(offsets) == 0: return
+            yields = self.predict_rows(np.full(len(offsets), crop, dtype=object),
+                                       np.full(len(offsets), province, dtype=object),
+                                       start + pd.to_timedelta(offsets, unit='D'))
+            scored.update(zip(offsets.tolist(), yields.tolist()))
+
+        # 1. Coarse pass
+        coarse = np.arange(0, horizon_days, step_days)
+        score(coarse)
+
+        # 2. Daily refinement within one step of the best coarse local maxima. A peak that
+        #    falls entirely between two coarse points can still be missed; step_days=1 is exhaustive.
+        if step_days > 1:
+            values = np.array([scored[o] for o in coarse.tolist()])
+            padded = np.concatenate([[-np.inf], values, [-np.inf]])
+            local = np.flatnonzero((values >= padded[:-2]) & (values >= padded[2:]))
+            peaks = coarse[local[np.argsort(-values[local], kind='stable')[:max(4, top_k * 2)]]]
+            fine = np.concatenate([np.arange(p - step_days + 1, p + step_days) for p in peaks])
+            fine = np.setdiff1d(fine[(fine >= 0) & (fine < horizon_days)], coarse)
+            score(fine)
+
+        offsets = np.array(sorted(scored))
+        yields = np.array([scored[o] for o in offsets.tolist()])
+        rows = []
+        for rank, i in enumerate(pick_windows(yields, top_k, min_gap_days, offsets), 1):
+            planting_date = start + pd.Timedelta(days=int(offsets[i]))
+            rows.append({
+                'window_rank': rank,
+                'planting_date': planting_date.strftime('%Y-%m-%d'),
+                'harvest_date': (planting_date + pd.Timedelta(days=int(round(duration)))).strftime('%Y-%m-%d'),
+                'yield_ton_ha': float(max(0, yields[i]))
+            })
+        return pd.DataFrame(rows, columns=['window_rank', 'planting_date', 'harvest_date', 'yield_ton_ha'])
@@ -0,0 +1,75 @@
+import os
+import sys
+import gc
+import signal
+import socket
+from waitress import serve
+
+def serve_prefork(app, host='0.0.0.0', port=5000, workers=2, threads=6, on_worker_exit=None):
+    """
+    Pre-fork serving: the caller loads the model and lookup tables once, then this
+    forks `workers` waitress processes that all accept on one shared listening socket.
+    Workers inherit the parent's memory copy-on-write (and the memory-mapped tables
+    through the page cache), so each extra worker costs little more than its own
+    interpreter state. Dead workers are restarted; SIGTERM/SIGINT stop them all.
+    `on_worker_exit` runs in each worker as it shuts down (e.g. to flush queued writes).
+    """
+    if not hasattr(os, 'fork'):
+        print("Pre-fork mode needs a POSIX system; serving with a single process.")
+        serve(app, host=host, port=port, threads=threads)
+        return
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+
+    # Move everything loaded so far out of the GC's reach, so collections in the
+    # workers don't write to (and un-share) the parent's pages.
+    gc.collect()
+    gc.freeze()
+
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            # Turn SIGTERM/SIGINT into a normal exit so `on_worker_exit` still runs
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+            signal.signal(signal.SIGINT, lambda signum, frame: sys.exit(0))
+            try:
+                serve(app, sockets=[sock], threads=threads)
+            finally:
+                if on_worker_exit is not None:
+                    on_worker_exit()
+                os._exit(0)
+        children.add(pid)
+        print(f"Worker {pid} started.")
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for _ in range(workers):
+        spawn()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited, restarting...")
+            spawn()
+
+    sock.close()
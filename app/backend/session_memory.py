@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+import database as db
+
+EMPTY_MEMORY = {"crop": None, "province": None}
+# Compare-and-set attempts per update before giving up on a hot session
+MAX_UPDATE_ATTEMPTS = 10
+
+class SessionMemory:
+    """
+    Conversational memory (last crop/province) per chat session: a thread-safe LRU
+    in front of the sessions table. Every change is written through to the table,
+    so an evicted session, or one served by another worker, is rebuilt from one
+    primary-key lookup. With `revalidate=True` (several worker processes) each read
+    goes to the table, since another worker may have updated the session. Writes are
+    a compare-and-set on the row's memory_version, retried on a fresh read when
+    another worker got there first, so concurrent updates are never lost.
+    """
+    def __init__(self, maxsize=1024, revalidate=False):
+        self.maxsize = maxsize
+        self.revalidate = revalidate
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # session_id -> {"crop", "province", "version"}
+        self._lock = threading.Lock()
+        # Serializes read-modify-write per session (striped, so other sessions don't wait)
+        self._session_locks = [threading.Lock() for _ in range(64)]
+
+    def get(self, session_id):
+        """Returns a copy of the session's memory (empty for unknown or missing sessions)."""
+        if not session_id: return dict(EMPTY_MEMORY)
+        return public(self._load(session_id))
+
+    def update(self, session_id, **changes):
+        """
+        Sets the given fields (e.g. crop=..., province=...) and returns the merged memory.
+        Fields passed as None are left as they are; use reset() to clear them.
+        """
+        changes = {k: v for k, v in changes.items() if v is not None}
+        if not session_id:
+            return dict(EMPTY_MEMORY, **changes)
+
+        with self.session_lock(session_id):
+            memory = self._load(session_id)
+            for _ in range(MAX_UPDATE_ATTEMPTS):
+                merged = dict(public(memory), **changes)
+                # Unchanged, or no session row to write to
+                if merged == public(memory) or memory['version'] is None:
+                    return merged
+                version = db.save_session_memory(session_id, merged['crop'], merged['province'],
+                                                 version=memory['version'])
+                if version is not None:
+                    self._store(session_id, dict(merged, version=version))
+                    return merged
+                # Another worker wrote first: merge into what it wrote
+                memory = self._load(session_id, fresh=True)
+        raise RuntimeError(f"Session {session_id} memory kept changing; update not saved")
+
+    def reset(self, session_id):
+        if not session_id: return
+        with self.session_lock(session_id):
+            version = db.save_session_memory(session_id, None, None)
+            self._store(session_id, dict(EMPTY_MEMORY, version=version))
+
+    def session_lock(self, session_id):
+        return self._session_locks[hash(session_id) % len(self._session_locks)]
+
+    def forget(self, session_id):
+        """Drops a session from the cache (e.g. after it was deleted)."""
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def _load(self, session_id, fresh=False):
+        """The cached entry, with its version, or a fresh one from the table."""
+        with self._lock:
+            memory = None if (fresh or self.revalidate) else self._entries.get(session_id)
+            if memory is not None:
+                self._entries.move_to_end(session_id)
+                self.hits += 1
+                return dict(memory)
+            self.misses += 1
+
+        memory = db.get_session_memory(session_id) or dict(EMPTY_MEMORY, version=None)
+        self._store(session_id, memory)
+        return dict(memory)
+
+    def _store(self, session_id, memory):
+        with self._lock:
+            self._entries[session_id] = dict(memory)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._entries),
+                'maxsize': self.maxsize
+            }
+
+def public(memory):
+    """The memory without its row version."""
+    return {"crop": memory["crop"], "province": memory["province"]}
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# The backend modules import each other as top-level modules (run from app/backend)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, 'DB_NAME', str(tmp_path / 'chat.db'))
+    monkeypatch.setattr(db._local, 'conn', None, raising=False)
+    db.init_db()
+    yield
+    db._local.conn.close()
+    db._local.conn = None
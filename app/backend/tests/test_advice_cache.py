@@ -0,0 +1,10 @@
+from advice_cache import AdviceCache
+
+def test_questions_are_part_of_the_key(tmp_path):
+    cache = AdviceCache(db_name=str(tmp_path / 'advice.db'))
+    cache.put('advice', 'Tentang Jahe', 'Tanam di tanah gembur.', 'cara tanam jahe?')
+
+    assert cache.get('advice', 'Tentang Jahe', 'Cara  tanam JAHE') == 'Tanam di tanah gembur.'
+    assert cache.get('advice', 'Tentang Jahe', 'kapan panen jahe') is None
+    assert cache.get('missing_info', 'Tentang Jahe', 'cara tanam jahe?') is None
+    assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from batch_predict import score_chunk
+
+class TinyEngine:
+    """The parts of CropPredictor that score_chunk uses, with a yield that encodes its inputs."""
+    province_index = {'aceh': 0, 'jawa barat': 1}
+
+    def normalize_province(self, prov):
+        if pd.isna(prov): return ""
+        return str(prov).lower().strip()
+
+    def predict_rows(self, crops, provinces, dates):
+        assert all(p in self.province_index for p in provinces)
+        return np.asarray(dates.day, dtype=float) + 100 * np.asarray(dates.month)
+
+def score(rows):
+    chunk = pd.DataFrame(rows, columns=['crop', 'province', 'planting_date'])
+    return score_chunk(TinyEngine(), chunk, {'padi': 'Padi'})
+
+def test_unknown_and_blank_provinces_are_rejected():
+    result = score([('padi', 'Aceh', '2025-03-12'), ('padi', 'bogus', '2025-03-12'),
+                    ('padi', None, '2025-03-12'), ('padi', '  ', '2025-03-12')])
+    assert result['error'].tolist() == [None, 'unknown province', 'unknown province', 'unknown province']
+    assert result['yield_ton_ha'].iloc[0] == 312
+    assert result['yield_ton_ha'].iloc[1:].isna().all()
+
+def test_non_iso_dates_are_day_first():
+    result = score([('padi', 'aceh', '12/03/2025'), ('padi', 'aceh', '31/12/2025'), ('padi', 'aceh', 'soon')])
+    assert result['planting_date'].tolist()[:2] == ['2025-03-12', '2025-12-31']
+    assert result['error'].tolist() == [None, None, 'invalid planting_date']
+
+def test_unknown_crop_wins_over_other_errors():
+    result = score([('kelapa', 'bogus', 'soon')])
+    assert result['error'].tolist() == ['unknown crop']
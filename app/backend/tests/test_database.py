@@ -0,0 +1,28 @@
+import pytest
+
+import database as db
+
+@pytest.mark.parametrize('cursor', ['abc', '12|', '|', 'yesterday|96833f7c-1a61-451a-afbc-96b28b1e0186',
+                                    '2026-01-10 00:21:43.619205|not-an-id', '2026-01-10 00:21:43.619205'])
+def test_malformed_sessions_cursor(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        db.parse_sessions_cursor(cursor)
+
+@pytest.mark.parametrize('cursor', ['abc', '1.5', '', '12|3'])
+def test_malformed_messages_cursor(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        db.parse_messages_cursor(cursor)
+
+def test_cursors_round_trip(fresh_db):
+    session_ids = [db.create_session(f"chat {i}") for i in range(5)]
+    for i in range(5):
+        db.add_message(session_ids[0], 'user', f"message {i}")
+
+    first = db.get_sessions_page(limit=3)
+    rest = db.get_sessions_page(limit=3, cursor=db.parse_sessions_cursor(first['next_cursor']))
+    assert [s['id'] for s in first['items'] + rest['items']] == session_ids[::-1]
+    assert rest['next_cursor'] is None
+
+    latest = db.get_messages_page(session_ids[0], limit=2)
+    older = db.get_messages_page(session_ids[0], limit=2, cursor=db.parse_messages_cursor(latest['next_cursor']))
+    assert [m['content'] for m in older['items'] + latest['items']] == [f"message {i}" for i in range(1, 5)]
@@ -0,0 +1,108 @@
+import ast
+import difflib
+import os
+import re
+
+import pytest
+
+from entity_index import EntityIndex, CITY, PROVINCE, crop_aliases, edit_distance
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_FILE = os.path.join(os.path.dirname(TESTS_DIR), 'app.py')
+QUERIES_FILE = os.path.join(TESTS_DIR, 'data', 'chat_queries.tsv')
+
+# The crops in final_training_data.csv (the engine's duration_lookup keys)
+CROPS = ['Jagung', 'Jahe', 'Kapulaga', 'Kencur', 'Kunyit', 'Laos/Lengkuas', 'Lempuyang', 'Lidah Buaya',
+         'Padi', 'Sambiloto', 'Serai', 'Temuireng', 'Temukunci', 'Temulawak']
+
+def app_constants(*names):
+    """Literal tables from app.py, read without importing it (importing app loads the engine)."""
+    with open(APP_FILE, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    found = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name) and node.targets[0].id in names:
+            found[node.targets[0].id] = ast.literal_eval(node.value)
+    return [found[name] for name in names]
+
+CITY_TO_PROVINCE, STOPWORDS = app_constants('CITY_TO_PROVINCE', 'STOPWORDS')
+PROVINCES = sorted(set(CITY_TO_PROVINCE.values()))
+CROP_ALIASES = crop_aliases(CROPS)
+
+def load_queries():
+    """(query, crop or None, province or None) rows of tests/data/chat_queries.tsv."""
+    rows = []
+    with open(QUERIES_FILE, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'): continue
+            query, crop, province = (line.rstrip('\n').split('\t') + ['', ''])[:3]
+            rows.append((query, crop or None, province or None))
+    return rows
+
+QUERIES = load_queries()
+
+def clean(text):
+    return re.sub(r'[^\w\s]', ' ', text.lower())
+
+def legacy_extract(text):
+    """extract_entities before the gazetteer index: substring scans, then difflib for crop typos only."""
+    clean_text = clean(text)
+    found_crop, found_prov = None, None
+    for city, prov in CITY_TO_PROVINCE.items():
+        if city in clean_text:
+            found_prov = prov
+            break
+    if not found_prov:
+        for prov in PROVINCES:
+            if prov in clean_text:
+                found_prov = prov
+                break
+    aliases = sorted(CROP_ALIASES, key=len, reverse=True)
+    for alias in aliases:
+        if re.search(r'\b' + re.escape(alias) + r'\b', clean_text):
+            found_crop = CROP_ALIASES[alias]
+            break
+    if not found_crop:
+        for word in clean_text.split():
+            if len(word) < 3 or word in STOPWORDS: continue
+            matches = difflib.get_close_matches(word, aliases, n=1, cutoff=0.8)
+            if matches:
+                found_crop = CROP_ALIASES[matches[0]]
+                break
+    return found_crop, found_prov
+
+@pytest.fixture(scope='module')
+def index():
+    return EntityIndex(CITY_TO_PROVINCE, PROVINCES, CROP_ALIASES)
+
+def extract(index, text):
+    crop, province, _ = index.extract(clean(text), skip=STOPWORDS)
+    return crop, province
+
+@pytest.mark.parametrize('query, crop, province', QUERIES, ids=[q for q, _, _ in QUERIES])
+def test_corpus(index, query, crop, province):
+    assert extract(index, query) == (crop, province)
+
+def test_corpus_recall_against_the_old_matcher(index):
+    crops_old = sum(legacy_extract(q)[0] == crop for q, crop, _ in QUERIES)
+    crops_new = sum(extract(index, q)[0] == crop for q, crop, _ in QUERIES)
+    places_old = sum(legacy_extract(q)[1] == prov for q, _, prov in QUERIES)
+    places_new = sum(extract(index, q)[1] == prov for q, _, prov in QUERIES)
+    assert crops_new >= crops_old
+    assert places_new >= places_old
+    # Nothing the old matcher got right is lost
+    for query, crop, province in QUERIES:
+        old_crop, old_prov = legacy_extract(query)
+        new_crop, new_prov = extract(index, query)
+        assert new_crop == crop or old_crop != crop, query
+        assert new_prov == province or old_prov != province, query
+
+def test_swaps_are_one_edit():
+    assert edit_distance('jgaung', 'jagung') == 1
+    assert edit_distance('padii', 'padi') == 1
+    assert edit_distance('kitten', 'sitting') == 3
+
+# "di <word>" puts these in a place slot; other everyday words (sekarang, belum, pasti) are in the corpus
+@pytest.mark.parametrize('word', ['musim', 'lahan', 'ladang', 'pasar', 'sawah', 'kebun'])
+def test_everyday_words_after_di_are_not_places(index, word):
+    assert index.fuzzy_match(f'tanam di {word}', [CITY, PROVINCE], skip=STOPWORDS) == {}
@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from llm_client import AdviceClient
+
+class StubUpstream(ThreadingHTTPServer):
+    """
+    Local chat-completions endpoint. Answers {"stream": true} requests with SSE chunks
+    and others with JSON, after `delay` seconds and once `gate` is open; `status` other
+    than 200 sends a plain-text error. Tracks concurrent requests and client connections.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.delay = 0.0
+        self.status = 200
+        self.gate = threading.Event()
+        self.gate.set()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.requests = 0
+        self.connections = set()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1/chat/completions"
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so the client's pooled connections are reused
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body['messages'][0]['content']
+        with server.lock:
+            server.requests += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            server.connections.add(self.client_address)
+        try:
+            server.gate.wait(timeout=10)
+            time.sleep(server.delay)
+            if server.status != 200:
+                self.send_text(server.status, 'text/plain', b'upstream down')
+            elif body.get('stream'):
+                self.send_sse(['advice ', 'for ', prompt])
+            else:
+                payload = {"choices": [{"message": {"content": f"advice for {prompt}"}}]}
+                self.send_text(200, 'application/json', json.dumps(payload).encode('utf-8'))
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def send_text(self, status, content_type, data):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_sse(self, tokens):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        events = [': keep-alive comment\n\n']
+        events += [f"data: {json.dumps({'choices': [{'delta': {'content': token}}]})}\n\n" for token in tokens]
+        events.append('data: [DONE]\n\n')
+        for event in events:
+            data = event.encode('utf-8')
+            self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+@pytest.fixture
+def upstream():
+    server = StubUpstream()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.gate.set()
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def client(upstream):
+    client = AdviceClient(upstream.url, 'test-key', 'test-model', max_concurrency=2, max_queue=1, timeout=5)
+    yield client
+    client.executor.shutdown(wait=True)
+    client.session.close()
+
+def wait_for(condition):
+    deadline = time.time() + 5
+    while not condition():
+        assert time.time() < deadline, "never reached the expected state"
+        time.sleep(0.01)
+
+def slots_free(client):
+    # Slots are released in the futures' done callbacks, just after the caller is woken
+    return client.slots._value == client.max_concurrency + client.max_queue
+
+def test_rejects_beyond_concurrency_plus_queue(upstream, client):
+    upstream.gate.clear()
+    results = {}
+    def call(i):
+        results[i] = client.complete(f"q{i}")
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(3)]
+    for t in threads: t.start()
+
+    # 2 requests held open upstream, 1 waiting for a slot: the pool is saturated
+    wait_for(lambda: upstream.active == 2 and client.stats()['submitted'] == 3)
+    stats = client.stats()
+    assert (stats['in_flight'], stats['queued'], stats['rejected']) == (2, 1, 0)
+
+    with pytest.raises(RuntimeError, match='pool is full'):
+        client.complete("q3")
+    with pytest.raises(RuntimeError, match='pool is full'):
+        next(client.stream("q4"))
+    assert client.stats()['rejected'] == 2
+
+    upstream.gate.set()
+    for t in threads: t.join(timeout=10)
+    assert results == {i: f"advice for q{i}" for i in range(3)}
+    assert upstream.max_active == 2
+    assert upstream.requests == 3
+
+    stats = client.stats()
+    assert (stats['submitted'], stats['completed'], stats['rejected']) == (3, 3, 2)
+    assert (stats['in_flight'], stats['queued'], stats['failed'], stats['timed_out']) == (0, 0, 0, 0)
+    assert stats['max_queue_ms'] > 0
+
+def test_connections_are_reused(upstream, client):
+    for i in range(6):
+        assert client.complete(f"q{i}") == f"advice for q{i}"
+        wait_for(lambda: slots_free(client))
+    # Sequential calls go over one kept-alive connection (at most one per pool thread)
+    assert len(upstream.connections) <= client.max_concurrency
+    assert client.stats()['completed'] == 6
+
+def test_stream_parses_sse_over_the_socket(upstream, client):
+    upstream.delay = 0.05
+    assert list(client.stream("jahe")) == ['advice ', 'for ', 'jahe']
+    wait_for(lambda: client.stats()['in_flight'] == 0)
+    stats = client.stats()
+    assert (stats['submitted'], stats['completed'], stats['failed']) == (1, 1, 0)
+
+def test_upstream_errors_are_counted(upstream, client):
+    upstream.status = 500
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.complete("q")
+    with pytest.raises(requests.exceptions.HTTPError):
+        list(client.stream("q"))
+    stats = client.stats()
+    assert (stats['failed'], stats['completed'], stats['in_flight']) == (2, 0, 0)
+
+def test_slow_upstream_times_out(upstream):
+    client = AdviceClient(upstream.url, 'test-key', 'test-model', max_concurrency=1, max_queue=0, timeout=0.3)
+    upstream.delay = 1.0
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.complete("q")
+    stats = client.stats()
+    assert (stats['failed'], stats['completed'], stats['in_flight']) == (1, 0, 0)
+    client.executor.shutdown(wait=True)
+
+def test_missing_api_key_fails_clearly(upstream):
+    client = AdviceClient(upstream.url, None, 'test-model')
+    with pytest.raises(RuntimeError, match='DEEPSEEK_API_KEY'):
+        client.complete("q")
+    assert client.stats()['submitted'] == 0
+    assert upstream.requests == 0
+    client.executor.shutdown()
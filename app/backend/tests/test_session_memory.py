@@ -0,0 +1,44 @@
+import threading
+
+import database as db
+from session_memory import SessionMemory
+
+def test_stale_worker_merges_instead_of_overwriting(fresh_db):
+    session_id = db.create_session()
+    first, second = SessionMemory(), SessionMemory()
+    assert first.get(session_id) == {"crop": None, "province": None}  # cached at version 0
+
+    second.update(session_id, province='jawa barat')
+    # first's cached copy is stale: its write must not drop the province
+    assert first.update(session_id, crop='Padi') == {"crop": 'Padi', "province": 'jawa barat'}
+    assert db.get_session_memory(session_id) == {"crop": 'Padi', "province": 'jawa barat', "version": 2}
+
+def test_concurrent_workers_lose_no_updates(fresh_db):
+    session_id = db.create_session()
+    rounds = 50
+
+    def worker(field, values):
+        memory = SessionMemory(revalidate=True)  # one per worker process
+        for value in values:
+            memory.update(session_id, **{field: value})
+
+    threads = [threading.Thread(target=worker, args=('crop', [f"crop {i}" for i in range(rounds)])),
+               threading.Thread(target=worker, args=('province', [f"prov {i}" for i in range(rounds)]))]
+    for t in threads: t.start()
+    for t in threads: t.join(timeout=30)
+
+    # Each worker's last write survives the other's, and every write got its own version
+    assert db.get_session_memory(session_id) == {"crop": f"crop {rounds - 1}", "province": f"prov {rounds - 1}",
+                                                 "version": 2 * rounds}
+
+def test_reset_invalidates_stale_writers(fresh_db):
+    session_id = db.create_session()
+    first, second = SessionMemory(), SessionMemory()
+    first.update(session_id, crop='Jahe', province='aceh')
+    second.reset(session_id)
+    assert first.update(session_id, province='bali') == {"crop": None, "province": 'bali'}
+
+def test_missing_session_is_not_written(fresh_db):
+    memory = SessionMemory()
+    assert memory.update('no-such-session', crop='Padi') == {"crop": 'Padi', "province": None}
+    assert db.get_session_memory('no-such-session') is None
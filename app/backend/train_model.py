@@ -1,70 +1,27 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
+import xgboost as xgb
 from xgboost import XGBRegressor
-from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+import argparse
+import datetime
+import hashlib
 import joblib
+import json
+import os
 import time
 
-# 1. Load Data
-print("Loading data...")
-df = pd.read_csv('final_training_data.csv')
-original_len = len(df)
-
-# 2. Advanced Preprocessing (The Game Changer)
-
-# A. Remove Outliers (Crucial for R2)
-# We remove the top 1% and bottom 1% of yields per Crop to eliminate bad data.
-print("Cleaning outliers...")
-cleaned_dfs = []
-for crop in df['Crop'].unique():
-    crop_df = df[df['Crop'] == crop]
-    # Calculate quantiles
-    low = crop_df['Target_Yield'].quantile(0.01)
-    high = crop_df['Target_Yield'].quantile(0.99)
-    # Filter
-    mask = (crop_df['Target_Yield'] >= low) & (crop_df['Target_Yield'] <= high)
-    cleaned_dfs.append(crop_df[mask])
-    
-df = pd.concat(cleaned_dfs)
-print(f"Removed {original_len - len(df)} outlier rows.")
-
-# B. Feature Engineering
-print("Engineering biological features...")
-df['Planting_Date'] = pd.to_datetime(df['Planting_Date'])
-df['Harvest_Date'] = pd.to_datetime(df['Harvest_Date'])
-
-# Feature 1: Seasonality (Month)
-# Crops behave differently in January vs July, even if temp is similar.
-df['Planting_Month'] = df['Planting_Date'].dt.month
-
-# Feature 2: Duration & Intensity
-df['Duration_Days'] = (df['Harvest_Date'] - df['Planting_Date']).dt.days
-df['Rain_Intensity'] = df['Total_Rainfall'] / df['Duration_Days'] # Rain per day
-df['Heat_Sum'] = df['Avg_Temp'] * df['Duration_Days'] # Growing Degree Days proxy
-
-# C. Log Transform Target
-print("Applying Log-Transformation...")
-y_log = np.log1p(df['Target_Yield'])
-
-# Drop non-numeric cols
-X = df.drop(columns=['Planting_Date', 'Harvest_Date', 'Target_Yield'])
-
-# D. One-Hot Encoding
-print("Encoding features...")
-X = pd.get_dummies(X, columns=['Crop', 'Province'])
-
-# Save columns
-joblib.dump(list(X.columns), 'model_columns.joblib')
-
-# 3. Split
-X_train, X_test, y_train_log, y_test_log = train_test_split(X, y_log, test_size=0.15, random_state=42)
-
-# 4. Configure XGBoost (Ultra Mode)
-print("Configuring XGBoost (Deep Learning Mode)...")
-
-model = XGBRegressor(
-    n_estimators=15000,       # Massive number of trees
+DATA_FILE = 'final_training_data.csv'
+MODEL_FILE = 'crop_yield_model.joblib'
+COLUMNS_FILE = 'model_columns.joblib'
+
+# Every trained model is kept here as <version>.joblib + <version>.json (metrics);
+# latest.json records what the promoted model was trained on, for the next warm start.
+MODELS_DIR = 'models'
+MANIFEST_FILE = os.path.join(MODELS_DIR, 'latest.json')
+
+PARAMS = dict(
     learning_rate=0.01,       # Very slow learning for maximum precision
     max_depth=14,             # Very deep trees to capture complex biology
     min_child_weight=5,       # Protects against overfitting
@@ -73,45 +30,238 @@ model = XGBRegressor(
     gamma=0.2,                # Minimum loss reduction to make a split
     reg_alpha=0.1,            # L1 Regularization
     reg_lambda=1.0,           # L2 Regularization
-    
-    # GPU Settings
-    tree_method='gpu_hist',
-    gpu_id=0,
-    predictor='gpu_predictor',
-    
-    n_jobs=-1,
+    tree_method='hist',
     random_state=42
 )
 
-# 5. Train
-print("Training Model on GPU (This will be intense)...")
-start_time = time.time()
-
-eval_set = [(X_test, y_test_log)]
-model.fit(
-    X_train, 
-    y_train_log, 
-    eval_set=eval_set,
-    verbose=200,              # Print every 200 rounds
-    early_stopping_rounds=150 
-)
+def prefix_hash(path, n_bytes):
+    """SHA-256 of the first `n_bytes` of a file (to check earlier rows weren't edited)."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        remaining = n_bytes
+        while remaining > 0:
+            chunk = f.read(min(1 << 20, remaining))
+            if not chunk: break
+            h.update(chunk)
+            remaining -= len(chunk)
+    return h.hexdigest()
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_FILE): return None
+    with open(MANIFEST_FILE) as f:
+        return json.load(f)
+
+def clean_outliers(df):
+    """Drops the top 1% and bottom 1% of yields per Crop (bad data)."""
+    yields = df.groupby('Crop')['Target_Yield']
+    low = yields.transform(lambda s: s.quantile(0.01))
+    high = yields.transform(lambda s: s.quantile(0.99))
+    return df[(df['Target_Yield'] >= low) & (df['Target_Yield'] <= high)]
+
+def engineer_features(df):
+    """Returns (X one-hot encoded, log1p target)."""
+    df = df.copy()
+    df['Planting_Date'] = pd.to_datetime(df['Planting_Date'])
+    df['Harvest_Date'] = pd.to_datetime(df['Harvest_Date'])
+
+    # Feature 1: Seasonality (Month)
+    # Crops behave differently in January vs July, even if temp is similar.
+    df['Planting_Month'] = df['Planting_Date'].dt.month
+
+    # Feature 2: Duration & Intensity
+    df['Duration_Days'] = (df['Harvest_Date'] - df['Planting_Date']).dt.days
+    df['Rain_Intensity'] = df['Total_Rainfall'] / df['Duration_Days'] # Rain per day
+    df['Heat_Sum'] = df['Avg_Temp'] * df['Duration_Days'] # Growing Degree Days proxy
+
+    # Log Transform Target
+    y_log = np.log1p(df['Target_Yield'])
+
+    # Drop non-numeric cols, One-Hot Encoding
+    X = df.drop(columns=['Planting_Date', 'Harvest_Date', 'Target_Yield'])
+    X = pd.get_dummies(X, columns=['Crop', 'Province'])
+    return X, y_log
+
+def evaluate(model, X, y_log):
+    y_pred_real = np.expm1(model.predict(X))
+    y_real = np.expm1(y_log)
+    return {
+        'mae': float(mean_absolute_error(y_real, y_pred_real)),
+        'rmse': float(np.sqrt(mean_squared_error(y_real, y_pred_real))),
+        'r2': float(r2_score(y_real, y_pred_real))
+    }
+
+def plan_warm_start(manifest, data_size, X_new_columns):
+    """Returns why a warm start isn't possible, or None if it is."""
+    if manifest is None or not os.path.exists(MODEL_FILE):
+        return "no previous model"
+    if data_size < manifest['trained_bytes'] or prefix_hash(DATA_FILE, manifest['trained_bytes']) != manifest['trained_sha256']:
+        return "previously trained rows changed"
+    unknown = sorted(set(X_new_columns) - set(manifest['columns']))
+    if unknown:
+        return f"new categories {unknown[:5]} need new input columns"
+    return None
+
+def continue_training(parent, X_train, y_train_log, X_test, y_test_log, n_rounds, device, n_jobs):
+    """
+    Adds trees to the parent model's booster with native xgb.train, so that the new trees
+    and the early-stopping metric start from the parent's own predictions.
+    Returns an XGBRegressor, which is what the backend loads.
+    """
+    booster = parent.get_booster()
+    # Continue from the best iteration, not from the rounds early stopping discarded
+    best_iteration = getattr(parent, 'best_iteration', None)
+    if best_iteration is not None:
+        booster = booster[:best_iteration + 1]
+
+    params = {key: value for key, value in PARAMS.items() if key != 'random_state'}
+    params.update(objective='reg:squarederror', seed=PARAMS['random_state'], device=device)
+    if n_jobs is not None:
+        params['nthread'] = n_jobs
+    dtrain = xgb.DMatrix(X_train, label=y_train_log)
+    dtest = xgb.DMatrix(X_test, label=y_test_log)
+    booster = xgb.train(
+        params, dtrain, num_boost_round=n_rounds, evals=[(dtest, 'validation_0')],
+        early_stopping_rounds=150, verbose_eval=200, xgb_model=booster
+    )
+
+    model = XGBRegressor()
+    model.load_model(bytearray(booster.save_raw()))
+    return model
+
+def train(args):
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    data_size = os.path.getsize(DATA_FILE)
+
+    # 1. Load Data
+    print("Loading data...")
+    df = pd.read_csv(DATA_FILE)
+    original_len = len(df)
+
+    # 2. Preprocessing
+    print("Cleaning outliers...")
+    df = clean_outliers(df)
+    print(f"Removed {original_len - len(df)} outlier rows.")
+
+    print("Engineering biological features...")
+    X, y_log = engineer_features(df)
+
+    manifest = load_manifest()
+    mode = 'full'
+    if not args.full:
+        reason = plan_warm_start(manifest, data_size, X.columns)
+        if reason is None:
+            mode = 'incremental'
+        else:
+            print(f"Full retrain: {reason}.")
+
+    # 3. Select rows: everything, or only the rows appended since the last training run
+    # (rows are identified by position in the CSV, so the file must only grow at the end)
+    columns = manifest['columns'] if mode == 'incremental' else list(X.columns)
+    X = X.reindex(columns=columns, fill_value=0).astype(np.float32)
+    if mode == 'incremental':
+        new_rows = X.index >= manifest['trained_rows']
+        if not new_rows.any():
+            print("No new rows since the last training run; nothing to do.")
+            return None
+        X_fit, y_fit = X[new_rows], y_log[new_rows]
+        print(f"Warm-starting from {manifest['version']} on {len(X_fit)} new rows...")
+    else:
+        X_fit, y_fit = X, y_log
+
+    X_train, X_test, y_train_log, y_test_log = train_test_split(X_fit, y_fit, test_size=0.15, random_state=42)
+
+    # 4. Configure XGBoost
+    n_rounds = args.rounds or (15000 if mode == 'full' else 1000)
+    n_jobs = args.threads if args.threads > 0 else None
+
+    # 5. Train
+    print(f"Training on {args.device} ({args.threads if args.threads > 0 else 'all'} threads, up to {n_rounds} rounds)...")
+    start_time = time.time()
+    parent = None
+    if mode == 'incremental':
+        parent = joblib.load(MODEL_FILE)
+        model = continue_training(parent, X_train, y_train_log, X_test, y_test_log, n_rounds, args.device, n_jobs)
+    else:
+        model = XGBRegressor(n_estimators=n_rounds, early_stopping_rounds=150, device=args.device, n_jobs=n_jobs, **PARAMS)
+        model.fit(X_train, y_train_log, eval_set=[(X_test, y_test_log)], verbose=200)
+    elapsed = time.time() - start_time
+    print(f"Training finished in {elapsed:.2f} seconds.")
 
-end_time = time.time()
-print(f"Training finished in {end_time - start_time:.2f} seconds.")
+    # 6. Evaluate (on the held-out rows only; the other rows were trained on)
+    print("Evaluating model...")
+    metrics = {'holdout': evaluate(model, X_test, y_test_log)}
+    if parent is not None:
+        metrics['parent_holdout'] = evaluate(parent, X_test, y_test_log)
+    print(f"--- RESULTS ---")
+    print(f"Mean Absolute Error: {metrics['holdout']['mae']:.2f}")
+    print(f"RMSE: {metrics['holdout']['rmse']:.2f}")
+    print(f"R2 Score: {metrics['holdout']['r2']:.2f}")
+    if parent is not None:
+        print(f"Parent {manifest['version']} on the same rows: RMSE {metrics['parent_holdout']['rmse']:.2f}, "
+              f"R2 {metrics['parent_holdout']['r2']:.2f}")
 
-# 6. Evaluate
-print("Evaluating model...")
-y_pred_log = model.predict(X_test)
+    # 7. Versioned artifact + metrics
+    version = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    record = {
+        'version': version,
+        'parent': manifest['version'] if mode == 'incremental' else None,
+        'mode': mode,
+        'rows_total': len(X),
+        'rows_fitted': len(X_fit),
+        'best_iteration': int(model.best_iteration),
+        'device': args.device,
+        'threads': args.threads,
+        'train_seconds': round(elapsed, 2),
+        'metrics': metrics,
+        'trained_rows': original_len,
+        'trained_bytes': data_size,
+        'trained_sha256': prefix_hash(DATA_FILE, data_size),
+        'columns': columns
+    }
+    joblib.dump(model, os.path.join(MODELS_DIR, f'{version}.joblib'))
+    with open(os.path.join(MODELS_DIR, f'{version}.json'), 'w') as f:
+        json.dump(record, f, indent=2)
+    print(f"Saved {MODELS_DIR}/{version}.joblib")
 
-# Reverse Log
-y_pred_real = np.expm1(y_pred_log)
-y_test_real = np.expm1(y_test_log)
+    if not args.no_promote:
+        promote(model, record)
+    return record
 
-mae = mean_absolute_error(y_test_real, y_pred_real)
-r2 = r2_score(y_test_real, y_pred_real)
+def promotion_blocker(record):
+    """Why a model must not replace its parent (worse on the parent's holdout rows), or None."""
+    parent = record['metrics'].get('parent_holdout')
+    if parent is None:
+        return None
+    child = record['metrics']['holdout']
+    if child['rmse'] > parent['rmse'] or child['r2'] < parent['r2']:
+        return (f"holdout RMSE {child['rmse']:.3f} / R2 {child['r2']:.3f} is worse than "
+                f"{record['parent']}'s {parent['rmse']:.3f} / {parent['r2']:.3f}")
+    return None
 
-print(f"--- ULTRA RESULTS ---")
-print(f"Mean Absolute Error: {mae:.2f}")
-print(f"R2 Score: {r2:.2f}")
+def promote(model, record):
+    """
+    Makes a trained model the one the backend loads (replaced atomically), unless it does
+    worse than its parent on the held-out rows. Returns whether it was promoted.
+    """
+    reason = promotion_blocker(record)
+    if reason:
+        print(f"Not promoting {record['version']}: {reason}.")
+        return False
+    for path, obj in ((COLUMNS_FILE, record['columns']), (MODEL_FILE, model)):
+        tmp = path + '.tmp'
+        joblib.dump(obj, tmp)
+        os.replace(tmp, path)
+    with open(MANIFEST_FILE + '.tmp', 'w') as f:
+        json.dump(record, f, indent=2)
+    os.replace(MANIFEST_FILE + '.tmp', MANIFEST_FILE)
+    print(f"Promoted {record['version']} to {MODEL_FILE}.")
+    return True
 
-joblib.dump(model, 'crop_yield_model.joblib')
\ No newline at end of file
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Train the crop yield model (warm-starts on appended rows when possible).")
+    parser.add_argument('--full', action='store_true', help="retrain from scratch on every row")
+    parser.add_argument('--rounds', type=int, default=None, help="max boosting rounds (default: 15000 full, 1000 incremental)")
+    parser.add_argument('--threads', type=int, default=-1, help="CPU threads (-1 = all cores)")
+    parser.add_argument('--device', default='cpu', help="'cpu' or 'cuda'")
+    parser.add_argument('--no-promote', action='store_true', help="only write the versioned artifact")
+    train(parser.parse_args())
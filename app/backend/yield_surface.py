@@ -0,0 +1,133 @@
+import os
+import json
+import threading
+import numpy as np
+
+SURFACE_FILE = 'yield_surface.npy'
+SURFACE_INDEX_FILE = 'yield_surface.json'
+
+# Files whose change invalidates a stored surface
+SOURCE_FILES = ['final_training_data.csv', 'crop_yield_model.joblib', 'model_columns.joblib']
+
+def source_fingerprint(paths=SOURCE_FILES):
+    """Cheap change detector: size + mtime of every source file."""
+    parts = []
+    for path in paths:
+        if os.path.exists(path):
+            st = os.stat(path)
+            parts.append(f"{path}:{st.st_size}:{st.st_mtime_ns}")
+        else:
+            parts.append(f"{path}:missing")
+    return "|".join(parts)
+
+class YieldSurface:
+    """
+    Predicted yield for every (crop, province, day-of-year slot), stored as a
+    float32 .npy file and served through a read-only memory map.
+
+    Weather, soil and the derived features only depend on the calendar day,
+    so one 366-slot surface answers planting dates in any year.
+    """
+    def __init__(self, values, crops):
+        self.values = values
+        self.crop_index = {crop: i for i, crop in enumerate(crops)}
+
+    def get(self, crop, prov_idx, day_idx):
+        """Yield(s) for one crop/province; `day_idx` may be a scalar or an array. None if crop unknown."""
+        c_idx = self.crop_index.get(crop)
+        if c_idx is None:
+            return None
+        return self.values[c_idx, prov_idx, day_idx]
+
+    @classmethod
+    def compute(cls, engine):
+        """Scores every combination with the live model, one batched call per crop."""
+        crops = sorted(engine.duration_lookup.keys())
+        n_provinces, n_days = engine.feature_tensor.shape[:2]
+
+        # Every (province, day-slot) pair, province-major
+        prov_rows = np.repeat(np.arange(n_provinces), n_days)
+        day_slots = np.tile(np.arange(n_days), n_provinces)
+        features = engine.feature_tensor[prov_rows, day_slots]
+        months = engine.slot_months[day_slots]
+
+        values = np.empty((len(crops), n_provinces, n_days), dtype=np.float32)
+        matrix = np.zeros((len(prov_rows), len(engine.model_columns)), dtype=np.float32)
+        builder = engine.feature_builder
+
+        for p_idx, prov in enumerate(engine.provinces):
+            prov_col = builder.province_index.get(prov)
+            if prov_col is not None:
+                matrix[p_idx * n_days:(p_idx + 1) * n_days, prov_col] = 1.0
+
+        for c_idx, crop in enumerate(crops):
+            dense = engine.dense_from_tensor_rows(features, months, engine.duration_lookup[crop])
+            for col, vals in dense.items():
+                idx = builder.column_index.get(col)
+                if idx is not None:
+                    matrix[:, idx] = vals
+
+            crop_col = builder.crop_index.get(crop)
+            if crop_col is not None:
+                matrix[:, crop_col] = 1.0
+            values[c_idx] = engine.predict_batch(matrix).reshape(n_provinces, n_days)
+            if crop_col is not None:
+                matrix[:, crop_col] = 0.0
+
+        return cls(values, crops)
+
+    def save(self, fingerprint, path=SURFACE_FILE, index_path=SURFACE_INDEX_FILE):
+        # Write to temp files then swap, so readers never see a half-written surface
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.asarray(self.values))
+        os.replace(tmp_path, path)
+
+        tmp_index = index_path + '.tmp'
+        with open(tmp_index, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'crops': list(self.crop_index),
+                       'shape': list(self.values.shape)}, f)
+        os.replace(tmp_index, index_path)
+
+    @classmethod
+    def load(cls, fingerprint, path=SURFACE_FILE, index_path=SURFACE_INDEX_FILE):
+        """Memory-maps a stored surface, or returns None if it is missing or stale."""
+        if not (os.path.exists(path) and os.path.exists(index_path)):
+            return None
+        with open(index_path) as f:
+            index = json.load(f)
+        if index['fingerprint'] != fingerprint:
+            return None
+
+        values = np.load(path, mmap_mode='r')
+        if list(values.shape) != index['shape']:
+            return None
+        return cls(values, index['crops'])
+
+class YieldSurfaceJob:
+    """
+    Background thread that memory-maps the stored surface, or rebuilds it when the
+    model or training data changed, and then attaches it to the engine.
+    The surface is keyed by calendar slot rather than by date, so it never needs a
+    scheduled refresh; it only goes stale when the source files change.
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.thread = threading.Thread(target=self.run, name='yield-surface', daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        try:
+            fingerprint = self.engine.source_fingerprint
+            surface = YieldSurface.load(fingerprint)
+            if surface is None:
+                print("Precomputing yield surface (crop x province x day)...")
+                YieldSurface.compute(self.engine).save(fingerprint)
+                surface = YieldSurface.load(fingerprint)
+            self.engine.yield_surface = surface
+            print(f"Yield surface ready: {surface.values.shape}")
+        except Exception as e:
+            print(f"Yield surface unavailable, using live model: {e}")
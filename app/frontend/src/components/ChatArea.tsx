@@ -8,7 +8,9 @@ export function ChatArea({
   messages, 
   onSendMessage, 
   isLoading, 
-  onToggleSidebar 
+  onToggleSidebar,
+  hasOlderMessages,
+  onLoadOlderMessages
 }: ChatAreaProps) {
   const [inputValue, setInputValue] = useState<string>('');
   const textareaRef = useRef<HTMLTextAreaElement>(null);
@@ -22,10 +24,11 @@ export function ChatArea({
     }
   }, [inputValue]);
 
-  // Scroll to bottom
+  // Scroll to bottom (only when the newest message changes, not when older ones are prepended)
+  const lastMessage = messages[messages.length - 1];
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
-  }, [messages, isLoading]);
+  }, [lastMessage, isLoading]);
 
   const handleSubmit = (e: React.FormEvent | React.KeyboardEvent) => {
     e.preventDefault();
@@ -73,6 +76,14 @@ export function ChatArea({
           </div>
         ) : (
           <div className="mx-auto flex w-full max-w-3xl flex-col gap-6 py-4">
+            {hasOlderMessages && onLoadOlderMessages && (
+              <button
+                onClick={onLoadOlderMessages}
+                className="self-center rounded-lg px-3 py-1.5 text-xs text-gray-500 hover:bg-gray-800/70 hover:text-gray-300 transition-colors"
+              >
+                Muat pesan sebelumnya
+              </button>
+            )}
             {messages.map((msg, i) => (
               <MessageBubble 
                 key={i} 
@@ -2,7 +2,7 @@ import { Plus, MessageSquare, Trash2 } from 'lucide-react';
 import { cn } from '../utils/cn';
 import type { SidebarProps } from '../types';
 
-export function Sidebar({ isOpen, onClose, onNewChat, sessions, onSelectSession, onDeleteSession }: SidebarProps & { onDeleteSession?: (id: string) => void }) {
+export function Sidebar({ isOpen, onClose, onNewChat, sessions, onSelectSession, hasMoreSessions, onLoadMoreSessions, onDeleteSession }: SidebarProps & { onDeleteSession?: (id: string) => void }) {
   return (
     <>
       {/* Mobile Overlay */}
@@ -59,6 +59,14 @@ export function Sidebar({ isOpen, onClose, onNewChat, sessions, onSelectSession,
                 )}
               </button>
             ))}
+            {hasMoreSessions && onLoadMoreSessions && (
+              <button
+                onClick={onLoadMoreSessions}
+                className="w-full rounded-lg px-2 py-2 text-xs text-gray-500 hover:bg-gray-800/70 hover:text-gray-300 transition-colors"
+              >
+                Muat lebih banyak
+              </button>
+            )}
           </div>
         </div>
       </aside>
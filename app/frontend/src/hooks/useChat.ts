@@ -1,22 +1,44 @@
 import { useState, useEffect } from 'react';
 import type { Message } from '../types';
-import { fetchCropPrediction, fetchSessions, createSession, fetchMessages, deleteSession, type Session } from '../services/api';
+import { streamCropPrediction, fetchSessions, createSession, fetchMessages, deleteSession, type Session, type Message as ServerMessage } from '../services/api';
+
+// Map server messages (role/content) to UI messages (text/isUser)
+const toUiMessages = (serverMessages: ServerMessage[]): Message[] =>
+  serverMessages.map(m => ({
+    text: m.content,
+    isUser: m.role === 'user'
+  }));
 
 export function useChat() {
   const [messages, setMessages] = useState<Message[]>([]);
   const [isLoading, setIsLoading] = useState<boolean>(false);
   const [sessionId, setSessionId] = useState<string | undefined>(undefined);
   const [sessions, setSessions] = useState<Session[]>([]);
+  const [sessionsCursor, setSessionsCursor] = useState<string | null>(null);
+  const [messagesCursor, setMessagesCursor] = useState<string | null>(null);
 
   // Load History on Mount
   useEffect(() => {
     loadSessions();
   }, []);
 
+  // Reloads the first (newest) page of sessions
   const loadSessions = async () => {
     try {
-      const list = await fetchSessions();
-      setSessions(list);
+      const page = await fetchSessions();
+      setSessions(page.items);
+      setSessionsCursor(page.next_cursor);
+    } catch (e) {
+      console.error(e);
+    }
+  };
+
+  const loadMoreSessions = async () => {
+    if (!sessionsCursor) return;
+    try {
+      const page = await fetchSessions(sessionsCursor);
+      setSessions((prev) => [...prev, ...page.items]);
+      setSessionsCursor(page.next_cursor);
     } catch (e) {
       console.error(e);
     }
@@ -26,13 +48,9 @@ export function useChat() {
     setIsLoading(true);
     setSessionId(id);
     try {
-      const serverMessages = await fetchMessages(id);
-      // Map server messages (role/content) to UI messages (text/isUser)
-      const uiMessages = serverMessages.map(m => ({
-        text: m.content,
-        isUser: m.role === 'user'
-      }));
-      setMessages(uiMessages);
+      const page = await fetchMessages(id);
+      setMessages(toUiMessages(page.items));
+      setMessagesCursor(page.next_cursor);
     } catch (e) {
       console.error(e);
     } finally {
@@ -40,12 +58,24 @@ export function useChat() {
     }
   };
 
+  const loadOlderMessages = async () => {
+    if (!sessionId || !messagesCursor) return;
+    try {
+      const page = await fetchMessages(sessionId, messagesCursor);
+      setMessages((prev) => [...toUiMessages(page.items), ...prev]);
+      setMessagesCursor(page.next_cursor);
+    } catch (e) {
+      console.error(e);
+    }
+  };
+
   const startNewSession = async () => {
     setIsLoading(true);
     try {
       const sess = await createSession();
       setSessionId(sess.id);
       setMessages([]);
+      setMessagesCursor(null);
       await loadSessions();
     } catch(e) {
       console.error(e);
@@ -66,6 +96,7 @@ export function useChat() {
       if (sessionId === id) {
         setSessionId(undefined);
         setMessages([]);
+        setMessagesCursor(null);
       }
     } catch (e) {
       console.error("Failed to delete session", e);
@@ -87,11 +118,32 @@ export function useChat() {
     setMessages((prev) => [...prev, userMsg]);
     setIsLoading(true);
 
+    // Replaces the text of the streaming AI bubble (always the last message)
+    const setAiText = (aiText: string) => {
+      setMessages((prev) => {
+        const last = prev[prev.length - 1];
+        if (last && !last.isUser) return [...prev.slice(0, -1), { text: aiText, isUser: false }];
+        return [...prev, { text: aiText, isUser: false }];
+      });
+    };
+
     try {
-      // Get AI Response
-      const responseText = await fetchCropPrediction(text, currentSessionId);
-      const aiMsg: Message = { text: responseText, isUser: false };
-      setMessages((prev) => [...prev, aiMsg]);
+      // Get AI Response: model result first, then the advice appended below it as it streams in
+      let resultText = '';
+      let advice = '';
+      const responseText = await streamCropPrediction(text, currentSessionId, {
+        onResult: (result) => {
+          setIsLoading(false);
+          resultText = result;
+          setAiText(resultText);
+        },
+        onToken: (token) => {
+          advice += token;
+          setAiText(resultText + '\n\n' + advice);
+        },
+      });
+      // The final message is the one the server stored (result + advice, as shown while streaming)
+      setAiText(responseText);
       
       // Refresh sessions to update title if it was "New Chat"
       loadSessions();
@@ -108,6 +160,7 @@ export function useChat() {
 
   const clearMessages = () => {
     setMessages([]);
+    setMessagesCursor(null);
     setSessionId(undefined);
   };
 
@@ -117,6 +170,10 @@ export function useChat() {
     handleSendMessage,
     clearMessages,
     sessions,
+    hasMoreSessions: sessionsCursor !== null,
+    loadMoreSessions,
+    hasOlderMessages: messagesCursor !== null,
+    loadOlderMessages,
     loadSession,
     startNewSession,
     handleDeleteSession,
@@ -6,6 +6,10 @@ import { useChat } from '../hooks/useChat';
 export function ChatPage() {
   const { messages, isLoading,    handleSendMessage, 
     sessions, 
+    hasMoreSessions,
+    loadMoreSessions,
+    hasOlderMessages,
+    loadOlderMessages,
     loadSession, 
     startNewSession,
     handleDeleteSession
@@ -24,6 +28,8 @@ export function ChatPage() {
         onClose={() => setSidebarOpen(false)}
         onNewChat={handleNewChat}
         sessions={sessions}
+        hasMoreSessions={hasMoreSessions}
+        onLoadMoreSessions={loadMoreSessions}
         onSelectSession={(id) => {
           loadSession(id);
           setSidebarOpen(false);
@@ -37,6 +43,8 @@ export function ChatPage() {
           onSendMessage={handleSendMessage}
           isLoading={isLoading}
           onToggleSidebar={() => setSidebarOpen(true)}
+          hasOlderMessages={hasOlderMessages}
+          onLoadOlderMessages={loadOlderMessages}
         />
       </div>
     </div>
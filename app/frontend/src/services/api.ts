@@ -9,10 +9,24 @@ export interface Message {
   content: string;
 }
 
+// Keyset-paginated list: pass `next_cursor` back to get the following page
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 const API_BASE = import.meta.env.VITE_API_URL;
 
-export const fetchSessions = async (): Promise<Session[]> => {
-  const res = await fetch(`${API_BASE}/sessions`);
+const pageQuery = (cursor?: string | null, limit?: number): string => {
+  const params = new URLSearchParams();
+  if (cursor) params.set('cursor', cursor);
+  if (limit) params.set('limit', String(limit));
+  const query = params.toString();
+  return query ? `?${query}` : '';
+};
+
+export const fetchSessions = async (cursor?: string | null, limit?: number): Promise<Page<Session>> => {
+  const res = await fetch(`${API_BASE}/sessions${pageQuery(cursor, limit)}`);
   if (!res.ok) throw new Error('Failed to load history');
   return res.json();
 };
@@ -27,8 +41,9 @@ export const createSession = async (title: string = 'New Chat'): Promise<Session
   return res.json();
 };
 
-export const fetchMessages = async (sessionId: string): Promise<Message[]> => {
-  const res = await fetch(`${API_BASE}/sessions/${sessionId}/messages`);
+// Latest messages first page; each next page holds older messages (items stay oldest-first)
+export const fetchMessages = async (sessionId: string, cursor?: string | null, limit?: number): Promise<Page<Message>> => {
+  const res = await fetch(`${API_BASE}/sessions/${sessionId}/messages${pageQuery(cursor, limit)}`);
   if (!res.ok) throw new Error('Failed to load messages');
   return res.json();
 };
@@ -62,3 +77,67 @@ export const fetchCropPrediction = async (prompt: string, sessionId?: string): P
     throw error;
   }
 };
+
+export interface PredictionStreamHandlers {
+  onResult?: (resultText: string) => void;
+  onToken?: (token: string) => void;
+}
+
+// Streams /predict/stream (server-sent events): the model result arrives first,
+// then the LLM advice token by token. Resolves with the final message (model result + advice).
+export const streamCropPrediction = async (
+  prompt: string,
+  sessionId: string | undefined,
+  handlers: PredictionStreamHandlers = {}
+): Promise<string> => {
+  const response = await fetch(`${API_BASE}/predict/stream`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ query: prompt, session_id: sessionId }),
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`API Error: ${response.status} ${response.statusText}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let aiMessage = '';
+
+  const handleEvent = (rawEvent: string) => {
+    let event = 'message';
+    let data = '';
+    for (const line of rawEvent.split('\n')) {
+      if (line.startsWith('event:')) event = line.slice(6).trim();
+      else if (line.startsWith('data:')) data += line.slice(5).trim();
+    }
+    if (!data) return;
+
+    const payload = JSON.parse(data);
+    if (event === 'result') handlers.onResult?.(payload.result_text);
+    else if (event === 'token') {
+      aiMessage += payload.text;
+      handlers.onToken?.(payload.text);
+    }
+    else if (event === 'done') aiMessage = payload.ai_message ?? aiMessage;
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      handleEvent(buffer.slice(0, boundary));
+      buffer = buffer.slice(boundary + 2);
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+  if (buffer.trim()) handleEvent(buffer);
+
+  return aiMessage;
+};
@@ -11,6 +11,8 @@ export interface SidebarProps {
   onNewChat: () => void;
   sessions?: { id: string; title: string }[];
   onSelectSession?: (id: string) => void;
+  hasMoreSessions?: boolean;
+  onLoadMoreSessions?: () => void;
 }
 
 
@@ -35,4 +37,6 @@ export interface ChatAreaProps {
   onSendMessage: (text: string) => void;
   isLoading: boolean;
   onToggleSidebar: () => void;
+  hasOlderMessages?: boolean;
+  onLoadOlderMessages?: () => void;
 }
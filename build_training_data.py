@@ -0,0 +1,246 @@
+import argparse
+import glob
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+import Biofarmaka_combined_converter
+
+# Builds app/backend/final_training_data.csv (what train_model.py and CropPredictor read) from
+# the daily converter outputs (convert_data.py), the SMAP soil moisture and SoilGrids profile
+# exported by AI/gee.ipynb, and an optional daily weather table. One row per (crop, province,
+# planting date): growing-season averages of the environment, and the yield harvested at the end.
+
+OUT_FILE = os.path.join('app', 'backend', 'final_training_data.csv')
+SOIL_MOISTURE_FILE = 'SoilMoisture.csv'
+SOIL_PROFILE_FILE = 'Data_Tanah_Indonesia_Adaptive_Fixed.csv'
+HERB_AREA_PATTERN = r'Luas Panen Tanaman Biofarmaka Menurut Provinsi dan Jenis Tanaman\s*,\s*(\d{4})\.csv'
+
+COLUMNS = ['Planting_Date', 'Harvest_Date', 'Crop', 'Province', 'Avg_Temp', 'Total_Rainfall', 'Avg_Humidity',
+           'Avg_Soil_Moisture', 'Soil_pH', 'Clay_Ratio', 'Sand_Ratio', 'Target_Yield']
+
+# Planting -> harvest (days); biofarmaka rhizomes and herbs take most of a year
+CROP_DURATION_DAYS = {'Padi': 110, 'Jagung': 100}
+HERB_DURATION_DAYS = 200
+
+# Target_Yield = production / harvested area over the days up to the harvest date
+HARVEST_WINDOW_DAYS = 30
+
+# Same fallbacks prediction_engine uses for provinces it has no data for
+DEFAULT_WEATHER = {'Avg_Temp': 28.0, 'Total_Rainfall': 1000.0, 'Avg_Humidity': 80.0, 'Avg_Soil_Moisture': 30.0}
+DEFAULT_SOIL = {'Soil_pH': 6.0, 'Clay_Ratio': 30.0, 'Sand_Ratio': 30.0}
+
+# Daily sources are matched to the nearest earlier reading up to this old
+ASOF_TOLERANCE = pd.Timedelta(days=7)
+
+PROVINCE_ALIASES = {'ntb': 'nusa tenggara barat', 'ntt': 'nusa tenggara timur'}
+
+def canonical_province(names):
+    """Lower-case full names, as in model_columns ('Kep. Riau' / 'KEP. RIAU' -> 'kepulauan riau')."""
+    names = pd.Series(names).astype(str).str.strip().str.lower().str.replace(r'^kep\.\s*', 'kepulauan ', regex=True)
+    return names.replace(PROVINCE_ALIASES).to_numpy()
+
+def read_daily(daily_dir, stem):
+    """A converter output from `daily_dir`: its Parquet dataset if there is one, else its CSV(s)."""
+    dataset = os.path.join(daily_dir, stem)
+    if os.path.isdir(dataset):
+        from daily_store import read_daily as read_dataset
+        return read_dataset(dataset)
+    paths = sorted(glob.glob(os.path.join(glob.escape(daily_dir), glob.escape(stem) + '*.csv')))
+    if not paths:
+        return None
+    frame = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    frame['Date'] = pd.to_datetime(frame['Date'])
+    return frame.rename(columns={'Provinsi': 'Province'})
+
+def read_herb_ratios(raw_dir):
+    """Harvested hectares per ton produced, per (Province, Crop, Year), from the raw BPS biofarmaka tables."""
+    ratios = []
+    for name in sorted(os.listdir(raw_dir)):
+        match = re.fullmatch(HERB_AREA_PATTERN, name)
+        production_name = name.replace('Luas Panen', 'Produksi', 1)
+        if not match or not os.path.exists(os.path.join(raw_dir, production_name)):
+            continue
+        area = pd.read_csv(os.path.join(raw_dir, name))
+        # Areas are in m2 except a few tree crops counted in trees, which have no yield per hectare
+        area_cols = {re.sub(r'^Luas Panen\s+|\s*\(.*$', '', col): col for col in area.columns if '(meter persegi)' in col}
+        provinces, production, crops = Biofarmaka_combined_converter.read_table(os.path.join(raw_dir, production_name))
+        area = area.set_index(area['Provinsi'].astype(str).str.strip())
+        for i, crop in enumerate(crops):
+            if crop not in area_cols: continue
+            area_ha = area[area_cols[crop]].reindex(provinces).map(Biofarmaka_combined_converter.clean_number).to_numpy() / 10000
+            ratios.append(pd.DataFrame({
+                'Province': canonical_province(provinces), 'Crop': crop, 'Year': int(match.group(1)),
+                'Ha_Per_Ton': area_ha / np.where(production[:, i] > 0, production[:, i] / 1000, np.nan)
+            }))
+    return pd.concat(ratios, ignore_index=True) if ratios else None
+
+def load_harvests(daily_dir, raw_dir):
+    """Daily harvested area (ha) and production (ton), long: Date, Province, Crop, Area_Ha, Production_Ton."""
+    frames = []
+    for crop in ('Padi', 'Jagung'):
+        daily = read_daily(daily_dir, f'{crop}_Daily_Combined')
+        if daily is None:
+            print(f"No {crop}_Daily_Combined output in {daily_dir}/, skipping {crop}.")
+            continue
+        frames.append(pd.DataFrame({
+            'Date': daily['Date'], 'Province': canonical_province(daily['Province']), 'Crop': crop,
+            'Area_Ha': daily['Luas_Panen_Ha'], 'Production_Ton': daily['Produksi_Ton']
+        }))
+
+    herbs = read_daily(daily_dir, 'Biofarmaka_Production_Daily_Combined')
+    ratios = read_herb_ratios(raw_dir)
+    if herbs is not None and ratios is not None:
+        # The daily converter only spreads production; area follows it at the year's ha-per-ton
+        herbs = pd.DataFrame({
+            'Date': herbs['Date'], 'Province': canonical_province(herbs['Province']), 'Crop': herbs['Crop'].astype(str),
+            'Year': herbs['Date'].dt.year, 'Production_Ton': herbs['Production_Kg'] / 1000
+        }).merge(ratios, on=['Province', 'Crop', 'Year'], how='inner')
+        herbs['Area_Ha'] = herbs['Production_Ton'] * herbs['Ha_Per_Ton']
+        frames.append(herbs.drop(columns=['Year', 'Ha_Per_Ton']))
+    elif herbs is not None:
+        print(f"No biofarmaka harvested-area tables in {raw_dir}/, skipping biofarmaka.")
+
+    harvests = pd.concat(frames, ignore_index=True)
+    return harvests[harvests['Area_Ha'].notna() & harvests['Production_Ton'].notna()]
+
+def load_environment(raw_dir, weather_path, soil_path):
+    """Daily (Province, Date, feature...) sources to join, and the static soil profile per province."""
+    daily = []
+    moisture_path = os.path.join(raw_dir, SOIL_MOISTURE_FILE)
+    if os.path.exists(moisture_path):
+        moisture = pd.read_csv(moisture_path)
+        daily.append(pd.DataFrame({
+            'Province': canonical_province(moisture['Provinsi']),
+            'Date': pd.to_datetime(moisture['Date'], errors='coerce'),
+            'Avg_Soil_Moisture': pd.to_numeric(moisture['Soil_Moisture_%'], errors='coerce')
+        }))
+    else:
+        print(f"No {moisture_path}; using the default soil moisture.")
+
+    if weather_path and os.path.exists(weather_path):
+        weather = pd.read_csv(weather_path).rename(columns={'Provinsi': 'Province'})
+        daily.append(pd.DataFrame({
+            'Province': canonical_province(weather['Province']),
+            'Date': pd.to_datetime(weather['Date'], errors='coerce'),
+            'Avg_Temp': pd.to_numeric(weather['Temperature'], errors='coerce'),
+            'Rainfall': pd.to_numeric(weather['Rainfall'], errors='coerce'),
+            'Avg_Humidity': pd.to_numeric(weather['Humidity'], errors='coerce')
+        }))
+    else:
+        print("No weather table; using the default temperature, rainfall and humidity.")
+
+    soil = None
+    if soil_path and os.path.exists(soil_path):
+        profile = pd.read_csv(soil_path)
+        soil = pd.DataFrame({
+            'Province': canonical_province(profile['Provinsi']),
+            'Soil_pH': profile['pH'], 'Clay_Ratio': profile['Clay_%'], 'Sand_Ratio': profile['Sand_%']
+        }).groupby('Province').mean()
+    else:
+        print("No soil profile table; using the default pH, clay and sand.")
+    return [frame.dropna(subset=['Date']) for frame in daily], soil
+
+def daily_panel(provinces, dates, sources):
+    """
+    Complete (province x day) grid with every daily source attached by merge_asof (the latest
+    reading per province at most ASOF_TOLERANCE old). Sorted by province, then date.
+    """
+    grid = pd.MultiIndex.from_product([provinces, dates], names=['Province', 'Date']).to_frame(index=False)
+    grid = grid.sort_values('Date', kind='stable')
+    for source in sources:
+        source = source.groupby(['Province', 'Date'], as_index=False).mean().sort_values('Date', kind='stable')
+        grid = pd.merge_asof(grid, source, on='Date', by='Province', direction='backward', tolerance=ASOF_TOLERANCE)
+    return grid.sort_values(['Province', 'Date'], kind='stable').reset_index(drop=True)
+
+def window_sums(values, rows, start, stop):
+    """
+    Sum and count of the non-NaN values[row, start:stop] for every (row, start, stop),
+    from one cumulative sum per row instead of a loop over windows.
+    """
+    valid = ~np.isnan(values)
+    sums = np.concatenate([np.zeros((len(values), 1)), np.cumsum(np.where(valid, values, 0), axis=1)], axis=1)
+    counts = np.concatenate([np.zeros((len(values), 1)), np.cumsum(valid, axis=1)], axis=1)
+    return sums[rows, stop] - sums[rows, start], counts[rows, stop] - counts[rows, start]
+
+def build(args):
+    start_time = time.time()
+    harvests = load_harvests(args.daily_dir, args.raw_dir)
+    if harvests.empty:
+        print("No harvest data; run convert_data.py first.")
+        return None
+    sources, soil = load_environment(args.raw_dir, args.weather, args.soil)
+
+    # Growing seasons may only start once the environment is observed
+    first_observed = max([source['Date'].min() for source in sources], default=harvests['Date'].min())
+    provinces = sorted(harvests['Province'].unique())
+    dates = pd.date_range(min(first_observed, harvests['Date'].min()), harvests['Date'].max(), freq='D')
+    first_planting = dates.get_loc(first_observed)
+
+    panel = daily_panel(provinces, dates, sources)
+    shape = (len(provinces), len(dates))
+    environment = {col: panel[col].to_numpy(dtype=float).reshape(shape) for col in panel.columns if col not in ('Province', 'Date')}
+
+    frames = []
+    for crop, crop_rows in harvests.groupby('Crop'):
+        duration = CROP_DURATION_DAYS.get(crop, HERB_DURATION_DAYS)
+        # (province x day) area / production, NaN where this crop has no data
+        cells = crop_rows.groupby(['Province', 'Date'])[['Area_Ha', 'Production_Ton']].sum()
+        cells = cells.reindex(pd.MultiIndex.from_product([provinces, dates], names=['Province', 'Date']))
+        area = cells['Area_Ha'].to_numpy().reshape(shape)
+        production = cells['Production_Ton'].to_numpy().reshape(shape)
+
+        # Harvest windows must lie inside this crop's data, growing seasons inside the environment's
+        first_day, last_day = dates.get_indexer([crop_rows['Date'].min(), crop_rows['Date'].max()])
+        harvest_days = np.arange(max(first_day + HARVEST_WINDOW_DAYS - 1, first_planting + duration), last_day + 1, args.step_days)
+        if len(harvest_days) == 0: continue
+        rows = np.repeat(np.arange(len(provinces)), len(harvest_days))
+        harvest = np.tile(harvest_days, len(provinces))
+        planting = harvest - duration
+
+        harvested_area, area_days = window_sums(area, rows, harvest + 1 - HARVEST_WINDOW_DAYS, harvest + 1)
+        produced, _ = window_sums(production, rows, harvest + 1 - HARVEST_WINDOW_DAYS, harvest + 1)
+        keep = (area_days == HARVEST_WINDOW_DAYS) & (harvested_area > 0)
+
+        sample = {
+            'Planting_Date': dates[planting[keep]].strftime('%Y-%m-%d'),
+            'Harvest_Date': dates[harvest[keep]].strftime('%Y-%m-%d'),
+            'Crop': crop,
+            'Province': np.asarray(provinces, dtype=object)[rows[keep]]
+        }
+        # Growing-season aggregates over [planting, harvest); days without readings are skipped
+        for col, default in DEFAULT_WEATHER.items():
+            source = 'Rainfall' if col == 'Total_Rainfall' else col
+            if source not in environment:
+                sample[col] = default
+                continue
+            total, observed = window_sums(environment[source], rows[keep], planting[keep], harvest[keep])
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = total / observed
+            # Rainfall is a season total: the daily mean scaled to the whole season
+            sample[col] = np.where(observed > 0, mean * duration if col == 'Total_Rainfall' else mean, default)
+        for col, default in DEFAULT_SOIL.items():
+            sample[col] = soil[col].reindex(sample['Province']).fillna(default).to_numpy() if soil is not None else default
+        sample['Target_Yield'] = produced[keep] / harvested_area[keep]
+        frames.append(pd.DataFrame(sample))
+
+    table = pd.concat(frames, ignore_index=True)[COLUMNS].round(4)
+    table.to_csv(args.out, index=False)
+    print(f"Saved {len(table)} rows ({table['Crop'].nunique()} crops, {table['Province'].nunique()} provinces) "
+          f"to {args.out} in {time.time() - start_time:.2f} seconds.")
+    return table
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the training table from the daily converter outputs and environment data.")
+    parser.add_argument('--daily-dir', default='filtered_data', help="convert_data.py output (CSV or Parquet)")
+    parser.add_argument('--raw-dir', default='raw_data', help=f"raw BPS tables and {SOIL_MOISTURE_FILE}")
+    parser.add_argument('--weather', default=os.path.join('raw_data', 'Weather.csv'),
+                        help="daily weather: Provinsi (or Province), Date, Temperature, Rainfall, Humidity")
+    parser.add_argument('--soil', default=os.path.join('raw_data', SOIL_PROFILE_FILE),
+                        help="SoilGrids profile from AI/gee.ipynb: Provinsi, pH, Clay_%%, Sand_%%")
+    parser.add_argument('--step-days', type=int, default=7, help="days between sampled harvest dates")
+    parser.add_argument('--out', default=OUT_FILE)
+    build(parser.parse_args())
@@ -0,0 +1,121 @@
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+import Biofarmaka_combined_converter
+import jagung_combined_converter
+import padi_converter
+import produksi_converter
+from daily_store import write_daily
+from disaggregate import task_rng
+
+# Converts every raw BPS table in raw_data/ into the daily CSVs in filtered_data/ (and/or,
+# with --format parquet, into Crop/Year-partitioned Parquet datasets; see daily_store.py).
+# Each (file, province, year) gets its own noise stream from task_rng(), so the output
+# is the same for any --workers / --chunk-size. (The individual converter scripts still
+# use one shared RandomState(42) stream and give different, order-dependent numbers.)
+
+DEFAULT_SEED = 42
+
+# (filename pattern with the year captured, converter, extra convert() arguments, output name)
+# Output names may use {year} (one file per year) or {first}/{last} (all years combined).
+# Converters taking annual totals also get target_months (see ANNUAL_MONTHS).
+DATASETS = [
+    (r'Luas Panen, Produksi, dan Produktivitas Padi Menurut Provinsi\s*,\s*(\d{4})\.csv',
+     padi_converter, {}, 'Padi_Daily_Combined_{first}_{last}.csv'),
+    (r'Luas Panen, Produksi, dan Produktivitas Jagung Menurut Provinsi\s*,\s*(\d{4})\.csv',
+     jagung_combined_converter, {}, 'Jagung_Daily_Combined_{first}_{last}.csv'),
+    (r'Produksi Tanaman Biofarmaka Menurut Provinsi dan Jenis Tanaman\s*,\s*(\d{4})\.csv',
+     Biofarmaka_combined_converter, {}, 'Biofarmaka_Production_Daily_Combined.csv'),
+    (r'Produksi Padi Menurut Provinsi \(Bulanan\)\s*,\s*(\d{4})\.csv',
+     produksi_converter, {'crop_name': 'Padi'}, 'Daily_Padi_Production_{year}.csv'),
+    (r'Produksi Jagung Pipilan Kering Kadar Air 14 Persen Menurut Provinsi \(Bulanan\)\s*,\s*(\d{4})\.csv',
+     produksi_converter, {'crop_name': 'Jagung'}, 'Daily_Jagung_Production_{year}.csv'),
+]
+
+# Annual tables are spread over these months; the training window starts in November 2023
+ANNUAL_MONTHS = {2023: [11, 12]}
+ANNUAL_CONVERTERS = (padi_converter, jagung_combined_converter, Biofarmaka_combined_converter)
+
+def discover(raw_dir):
+    """
+    Returns [(path, year, converter, convert() arguments, output name, Parquet dataset name)],
+    grouped by output, by year.
+    """
+    names = sorted(os.listdir(raw_dir))
+    jobs = []
+    for pattern, converter, extra, output in DATASETS:
+        matches = [(int(m.group(1)), name) for name in names for m in [re.fullmatch(pattern, name)] if m]
+        years = [year for year, _ in matches]
+        for year, name in sorted(matches):
+            kwargs = dict(extra)
+            if converter in ANNUAL_CONVERTERS:
+                kwargs['target_months'] = ANNUAL_MONTHS.get(year, list(range(1, 13)))
+            out_name = output.format(year=year, first=min(years), last=max(years))
+            # One Parquet dataset per output whatever years it spans, e.g. Padi_Daily_Combined/Crop=Padi/Year=2024/
+            dataset = re.sub(r'_?\{(year|first|last)\}', '', output).removesuffix('.csv')
+            jobs.append((Path(raw_dir) / name, year, converter, kwargs, out_name, dataset))
+    return jobs
+
+def convert_chunk(convert, file_name, provinces, values, columns, year, kwargs, seed):
+    """Runs in a worker: one stream per province, keyed by (file, province, year)."""
+    rngs = [task_rng(seed, file_name, province, year) for province in provinces]
+    return convert(provinces, values, columns, year, rngs, **kwargs)
+
+def run(args):
+    jobs = discover(args.raw_dir)
+    if not jobs:
+        print(f"No known BPS tables found in {args.raw_dir}/")
+        return
+
+    start_time = time.time()
+    outputs, datasets = {}, {}
+    workers = args.workers if args.workers > 0 else os.cpu_count()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for path, year, converter, kwargs, out_name, dataset in jobs:
+            table = converter.read_table(path)
+            if table is None:
+                continue
+            provinces, values, columns = table
+            print(f"{path.name}: {len(provinces)} provinces ({year})")
+            for lo in range(0, len(provinces), args.chunk_size):
+                task = (converter.convert, path.name, provinces[lo:lo + args.chunk_size], values[lo:lo + args.chunk_size],
+                        columns, year, kwargs, args.seed)
+                result = pool.submit(convert_chunk, *task) if pool else convert_chunk(*task)
+                outputs.setdefault(out_name, []).append(result)
+            # Padi / jagung frames have no Crop column; their converter names the crop
+            datasets[out_name] = (dataset, getattr(converter, 'CROP', None))
+
+        # Chunks are concatenated in submission order, whichever worker finished first
+        os.makedirs(args.out_dir, exist_ok=True)
+        for out_name, results in outputs.items():
+            frames = [result.result() if pool else result for result in results]
+            final_df = pd.concat(frames, ignore_index=True)
+            if args.format in ('csv', 'both'):
+                final_df.to_csv(Path(args.out_dir) / out_name, index=False)
+                print(f"Saved {len(final_df)} rows to {Path(args.out_dir) / out_name}")
+            if args.format in ('parquet', 'both'):
+                dataset, crop = datasets[out_name]
+                dataset_path = Path(args.out_dir) / dataset
+                write_daily(final_df, dataset_path, crop=crop)
+                print(f"Saved {len(final_df)} rows to {dataset_path}/")
+    finally:
+        if pool:
+            pool.shutdown()
+    print(f"Converted {len(jobs)} files with {workers} worker(s) in {time.time() - start_time:.2f} seconds.")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert the raw BPS tables into daily series, in parallel and reproducibly.")
+    parser.add_argument('--raw-dir', default='raw_data')
+    parser.add_argument('--out-dir', default='filtered_data')
+    parser.add_argument('--workers', type=int, default=-1, help="worker processes (-1 = all cores, 1 = no pool)")
+    parser.add_argument('--chunk-size', type=int, default=8, help="provinces per task")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--format', choices=['csv', 'parquet', 'both'], default='csv', help="parquet needs pyarrow")
+    run(parser.parse_args())
@@ -0,0 +1,78 @@
+import pandas as pd
+
+# Optional columnar copy of the converter outputs: one Parquet dataset per output, partitioned
+# as <dataset>/Crop=<crop>/Year=<year>/, with date32 dates, dictionary-encoded (categorical)
+# Province / Crop and float32 values. Needs pyarrow; the CSV outputs don't.
+
+KEY_COLUMNS = ['Date', 'Province', 'Crop']
+
+def import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError:
+        raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+    return pa, ds
+
+def partition_schema(pa):
+    return pa.schema([('Crop', pa.dictionary(pa.int32(), pa.string())), ('Year', pa.int16())])
+
+def to_columnar(frame, crop=None):
+    """Converter frame -> compact frame with KEY_COLUMNS, Year and float32 value columns."""
+    frame = frame.rename(columns={'Provinsi': 'Province'})
+    if 'Crop' not in frame.columns:
+        frame = frame.assign(Crop=crop)
+    dates = pd.to_datetime(frame['Date'], format='%Y-%m-%d')
+    values = [col for col in frame.columns if col not in KEY_COLUMNS]
+    compact = pd.DataFrame({
+        'Date': dates.dt.date,
+        'Province': frame['Province'].astype('category'),
+        'Crop': frame['Crop'].astype('category'),
+        'Year': dates.dt.year.astype('int16'),
+        **{col: frame[col].astype('float32') for col in values}
+    })
+    # Sorted so each row group covers few provinces and a narrow date range (tighter statistics)
+    return compact.sort_values(['Crop', 'Year', 'Province', 'Date'], kind='stable', ignore_index=True)
+
+def write_daily(frame, path, crop=None):
+    """Writes a converter frame as a partitioned Parquet dataset, replacing the partitions it covers."""
+    pa, ds = import_pyarrow()
+    compact = to_columnar(frame, crop)
+    schema = pa.schema(
+        [('Date', pa.date32()), ('Province', pa.dictionary(pa.int32(), pa.string())),
+         ('Crop', pa.dictionary(pa.int32(), pa.string())), ('Year', pa.int16())]
+        + [(col, pa.float32()) for col in compact.columns[4:]]
+    )
+    table = pa.Table.from_pandas(compact, schema=schema, preserve_index=False)
+    ds.write_dataset(
+        table, path, format='parquet', partitioning=ds.partitioning(partition_schema(pa), flavor='hive'),
+        existing_data_behavior='delete_matching', basename_template='part-{i}.parquet'
+    )
+    return len(table)
+
+def read_daily(path, start=None, end=None, provinces=None, crops=None, columns=None):
+    """
+    Reads a dataset written by write_daily() into a DataFrame (Province / Crop categorical).
+    The date range, provinces and crops are pushed down: Crop/Year partitions outside them
+    are never opened and row groups are skipped by their statistics.
+    """
+    pa, ds = import_pyarrow()
+    partitioning = ds.HivePartitioning.discover(infer_dictionary=True, schema=partition_schema(pa))
+    dataset = ds.dataset(path, format='parquet', partitioning=partitioning)
+
+    conditions = []
+    if start is not None:
+        start = pd.Timestamp(start)
+        conditions += [ds.field('Year') >= start.year, ds.field('Date') >= pa.scalar(start.date(), pa.date32())]
+    if end is not None:
+        end = pd.Timestamp(end)
+        conditions += [ds.field('Year') <= end.year, ds.field('Date') <= pa.scalar(end.date(), pa.date32())]
+    if provinces is not None:
+        conditions.append(ds.field('Province').isin(list(provinces)))
+    if crops is not None:
+        conditions.append(ds.field('Crop').isin(list(crops)))
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(columns=columns, filter=expression).to_pandas(date_as_object=False)
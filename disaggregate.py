@@ -0,0 +1,144 @@
+import hashlib
+import numpy as np
+import pandas as pd
+
+# Shared by the converter scripts: spreads BPS annual / monthly totals over the days
+# of a year with multiplicative N(1, NOISE_SCALE) noise, for a whole table at once.
+
+NOISE_SCALE = 0.1
+
+def task_rng(seed, *key):
+    """
+    Independent noise stream for one task, e.g. task_rng(42, file name, province, year).
+    Derived from the key alone, so it is the same whichever process or order runs the task.
+    """
+    digest = hashlib.sha256('|'.join(str(part) for part in key).encode('utf-8')).digest()
+    return np.random.default_rng(np.random.SeedSequence([seed, *np.frombuffer(digest, dtype=np.uint32).tolist()]))
+
+def draw_noise(rng, counts, scale):
+    """
+    counts[i] N(1, scale) draws for row i, concatenated: from one stream in row order, or
+    from rng[i] when `rng` is a list with one stream per row.
+    """
+    if isinstance(rng, (list, tuple)):
+        draws = [row_rng.normal(loc=1.0, scale=scale, size=int(n)) for row_rng, n in zip(rng, counts)]
+        return np.concatenate(draws) if draws else np.empty(0)
+    return rng.normal(loc=1.0, scale=scale, size=int(np.sum(counts)))
+
+def month_starts(year, months):
+    return np.array([f"{year}-{m:02d}" for m in months], dtype='datetime64[M]')
+
+def month_lengths(year, months):
+    """Days in each of `months` of `year` (calendar-aware, so February follows leap years)."""
+    starts = month_starts(year, months)
+    return ((starts + 1).astype('datetime64[D]') - starts.astype('datetime64[D]')).astype(int)
+
+def daily_dates(year, months):
+    """'YYYY-MM-DD' for every day of `months` in `year`, month by month."""
+    lengths = month_lengths(year, months)
+    first_day = np.repeat(month_starts(year, months).astype('datetime64[D]'), lengths)
+    day_in_month = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return (first_day + day_in_month).astype(str)
+
+def spread(totals, noise, cumulative, clip_first):
+    """
+    Splits each of `totals` (n,) over the k columns of `noise` (n, k).
+    Cumulative totals (area, production) get total/k * noise rescaled to sum back to
+    the total; rates (productivity) get total * noise. With `clip_first`, negative
+    values are zeroed before rescaling.
+    """
+    k = noise.shape[1]
+    if not cumulative:
+        return totals[:, None] * noise
+
+    values = (totals / k)[:, None] * noise
+    if clip_first:
+        values = np.maximum(values, 0)
+    sums = values.sum(axis=1)
+    ok = sums > 0
+    values[ok] = values[ok] * (totals[ok] / sums[ok])[:, None]
+    # Every draw clipped away (not reachable at scale 0.1): spread evenly instead
+    values[~ok] = (totals[~ok] / k)[:, None]
+    return values
+
+def annual_to_daily(totals, year, target_months, cumulative, rng, clip_first=False, scale=NOISE_SCALE):
+    """
+    Disaggregates annual totals into daily values over `target_months` of `year`.
+
+    `totals` is (n_rows, n_series), e.g. one column each for area, production and
+    productivity; `cumulative` flags each series (see spread()). Each positive total is
+    first split over 12 months, then each target month over its days. Totals <= 0
+    come out as zeros. Without `clip_first`, negative days are zeroed at the end.
+
+    Noise is drawn in a single call, in the order the old per-row loops drew it (row by
+    row, series by series: 12 month factors, then one per day of each target month),
+    so a RandomState seeded as before reproduces the old output exactly.
+    `rng` may also be a list of per-row streams (see task_rng()).
+    Returns (daily values (n_rows, n_series, n_days), dates (n_days,)).
+    """
+    totals = np.asarray(totals, dtype=float)
+    n_rows, n_series = totals.shape
+    lengths = month_lengths(year, target_months)
+    offsets = np.cumsum(lengths) - lengths
+    n_days = int(lengths.sum())
+
+    active = np.flatnonzero(totals.ravel() > 0)
+    series_totals = totals.ravel()[active]
+    series_cumulative = np.asarray(cumulative, dtype=bool)[active % n_series]
+    per_row = (totals > 0).sum(axis=1) * (12 + n_days)
+    noise = draw_noise(rng, per_row, scale).reshape(len(active), 12 + n_days)
+
+    daily = np.zeros((len(active), n_days))
+    for flag in (True, False):
+        rows = np.flatnonzero(series_cumulative == flag)
+        if len(rows) == 0: continue
+        monthly = spread(series_totals[rows], noise[rows, :12], flag, clip_first)
+        for j, month in enumerate(target_months):
+            days = slice(offsets[j], offsets[j] + lengths[j])
+            day_noise = noise[rows, 12 + offsets[j]:12 + offsets[j] + lengths[j]]
+            daily[rows, days] = spread(monthly[:, month - 1], day_noise, flag, clip_first)
+
+    if not clip_first:
+        daily = np.maximum(daily, 0)
+
+    out = np.zeros((n_rows * n_series, n_days))
+    out[active] = daily
+    return out.reshape(n_rows, n_series, n_days), daily_dates(year, target_months)
+
+def monthly_to_daily(monthly, year, months, rng, scale=NOISE_SCALE):
+    """
+    Disaggregates monthly totals `monthly` (n_rows, len(months)) into daily values.
+    Each positive month draws one factor per day (row by row, month by month, as the
+    old loop did); totals <= 0 come out as zeros. `rng` is as in annual_to_daily().
+    Returns (daily values (n_rows, n_days), dates (n_days,)).
+    """
+    monthly = np.asarray(monthly, dtype=float)
+    lengths = month_lengths(year, months)
+    offsets = np.cumsum(lengths) - lengths
+
+    active = monthly > 0
+    draws = np.where(active, lengths[None, :], 0).ravel()
+    starts = (np.cumsum(draws) - draws).reshape(monthly.shape)
+    noise = draw_noise(rng, draws.reshape(monthly.shape).sum(axis=1), scale)
+
+    daily = np.zeros((monthly.shape[0], int(lengths.sum())))
+    for j in range(len(months)):
+        rows = np.flatnonzero(active[:, j])
+        if len(rows) == 0: continue
+        day_noise = noise[starts[rows, j][:, None] + np.arange(lengths[j])]
+        daily[rows, offsets[j]:offsets[j] + lengths[j]] = spread(monthly[rows, j], day_noise, True, True)
+    return daily, daily_dates(year, months)
+
+def daily_frame(dates, labels, values, decimals=2):
+    """
+    Long daily table: one row per (input row, day) with a Date column, the per-row
+    `labels` (name -> array of n_rows) repeated, and `values` (name -> (n_rows, n_days))
+    flattened and rounded.
+    """
+    n_rows, n_days = len(next(iter(labels.values()))), len(dates)
+    frame = {'Date': np.tile(dates, n_rows)}
+    for name, column in labels.items():
+        frame[name] = np.repeat(np.asarray(column, dtype=object), n_days)
+    for name, column in values.items():
+        frame[name] = np.round(np.asarray(column).reshape(n_rows * n_days), decimals)
+    return pd.DataFrame(frame)
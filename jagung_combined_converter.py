@@ -1,61 +1,24 @@
 from pathlib import Path
 import pandas as pd
 import numpy as np
-import calendar
 import os
 
+from disaggregate import annual_to_daily, daily_frame
+
 input_folder_path = Path("raw_data")
 output_folder_path = Path("filtered_data")
 FILE_2023 = input_folder_path / "Luas Panen, Produksi, dan Produktivitas Jagung Menurut Provinsi, 2023.csv"
 FILE_2024 = input_folder_path / "Luas Panen, Produksi, dan Produktivitas Jagung Menurut Provinsi, 2024.csv"
 OUTPUT_FILE = output_folder_path / "Jagung_Daily_Combined_2023_2024.csv"
 
-np.random.seed(42)
-
-def generate_noise(n, scale=0.1):
-    return np.random.normal(loc=1.0, scale=scale, size=n)
-
-def distribute_value(yearly_val, year, target_months, is_cumulative):
-    if yearly_val <= 0:
-        return []
-
-    results = []
-
-    if is_cumulative:
-        base_month = yearly_val / 12.0
-        month_noise = generate_noise(12, 0.1)
-        monthly_vals = base_month * month_noise
-        
-        current_sum = np.sum(monthly_vals)
-        if current_sum > 0:
-            monthly_vals = monthly_vals * (yearly_val / current_sum)
-    else:
-        month_noise = generate_noise(12, 0.1)
-        monthly_vals = yearly_val * month_noise
+rng = np.random.RandomState(42)
 
-    for m_idx in target_months:
-        m_val = monthly_vals[m_idx - 1]
-        days_in_month = calendar.monthrange(year, m_idx)[1]
+CROP = 'Jagung'
 
-        if is_cumulative:
-            base_day = m_val / days_in_month
-            day_noise = generate_noise(days_in_month, 0.1)
-            daily_vals = base_day * day_noise
-            
-            d_sum = np.sum(daily_vals)
-            if d_sum > 0:
-                daily_vals = daily_vals * (m_val / d_sum)
-        else:
-            day_noise = generate_noise(days_in_month, 0.1)
-            daily_vals = m_val * day_noise
-
-        daily_vals = np.maximum(daily_vals, 0)
-
-        for day_num, val in enumerate(daily_vals, start=1):
-            date_str = f"{year}-{m_idx:02d}-{day_num:02d}"
-            results.append({'Date': date_str, 'Value': val})
-
-    return results
+# Area and production are split so the days sum back to the annual total;
+# productivity is a rate, so every day stays around the annual value.
+SERIES = ['Luas_Panen_Ha', 'Produksi_Ton', 'Produktivitas_Ku_Ha']
+CUMULATIVE = [True, True, False]
 
 def find_header_row(df):
     for i, row in df.iterrows():
@@ -74,19 +37,14 @@ def clean_number(val):
     except ValueError:
         return 0.0
 
-def process_file(filepath, year, target_months):
-    print(f"Reading {filepath}...")
-    
-    if not os.path.exists(filepath):
-        print(f"Error: File {filepath} not found.")
-        return []
-
+def read_table(filepath):
+    """Returns (provinces, annual totals (n, 3) in SERIES order, SERIES), or None if unreadable."""
     df_raw = pd.read_csv(filepath, header=None)
     
     header_idx = find_header_row(df_raw)
     if header_idx == -1:
         print(f"Error: Could not find header row in {filepath}")
-        return []
+        return None
 
     df = pd.read_csv(filepath, header=header_idx)
     
@@ -98,50 +56,54 @@ def process_file(filepath, year, target_months):
         col_yield = next(i for i, c in enumerate(cols) if 'produktivitas' in c)
     except StopIteration:
         print(f"Error: Could not identify required columns in {filepath}")
-        return []
+        return None
 
-    processed_rows = []
+    prov = df.iloc[:, col_prov]
+    prov_str = prov.astype(str)
+    keep = (prov.notna() & (prov_str.str.lower() != 'indonesia') & ~prov_str.str.isnumeric()).to_numpy()
+    df = df[keep]
 
-    for _, row in df.iterrows():
-        prov = row.iloc[col_prov]
-        
-        if pd.isna(prov) or str(prov).lower() == 'indonesia' or str(prov).isnumeric():
-            continue
+    totals = np.column_stack([df.iloc[:, col].map(clean_number).to_numpy(dtype=float) for col in (col_area, col_prod, col_yield)])
+    return prov_str[keep].str.strip().to_numpy(), totals, SERIES
 
-        prov = str(prov).strip()
-        
-        ann_area = clean_number(row.iloc[col_area])
-        ann_prod = clean_number(row.iloc[col_prod])
-        ann_yield = clean_number(row.iloc[col_yield])
+def convert(provinces, totals, series, year, rng, target_months):
+    """Daily frame for the rows of read_table(); `rng` may be one stream or one per province."""
+    daily, dates = annual_to_daily(totals, year, target_months, CUMULATIVE, rng)
 
-        daily_area = distribute_value(ann_area, year, target_months, True)
-        daily_prod = distribute_value(ann_prod, year, target_months, True)
-        daily_yield = distribute_value(ann_yield, year, target_months, False)
+    # Provinces without harvested area have nothing to report
+    has_area = totals[:, 0] > 0
+    return daily_frame(
+        dates,
+        {'Provinsi': provinces[has_area]},
+        {name: daily[has_area, i] for i, name in enumerate(series)}
+    )
 
-        for i in range(len(daily_area)):
-            processed_rows.append({
-                'Date': daily_area[i]['Date'],
-                'Provinsi': prov,
-                'Luas_Panen_Ha': round(daily_area[i]['Value'], 2),
-                'Produksi_Ton': round(daily_prod[i]['Value'], 2),
-                'Produktivitas_Ku_Ha': round(daily_yield[i]['Value'], 2)
-            })
+def process_file(filepath, year, target_months):
+    print(f"Reading {filepath}...")
+    
+    if not os.path.exists(filepath):
+        print(f"Error: File {filepath} not found.")
+        return None
 
-    return processed_rows
+    table = read_table(filepath)
+    if table is None:
+        return None
+    return convert(*table, year, rng, target_months)
 
-print("Starting Jagung Data Processing...")
+if __name__ == "__main__":
+    print("Starting Jagung Data Processing...")
 
-os.makedirs(output_folder_path, exist_ok=True)
+    os.makedirs(output_folder_path, exist_ok=True)
 
-rows_2023 = process_file(FILE_2023, 2023, [11, 12])
+    rows_2023 = process_file(FILE_2023, 2023, [11, 12])
 
-rows_2024 = process_file(FILE_2024, 2024, list(range(1, 13)))
+    rows_2024 = process_file(FILE_2024, 2024, list(range(1, 13)))
 
-all_data = rows_2023 + rows_2024
+    frames = [rows for rows in (rows_2023, rows_2024) if rows is not None and len(rows)]
 
-if all_data:
-    df_final = pd.DataFrame(all_data)
-    df_final.to_csv(OUTPUT_FILE, index=False)
-    print(f"Success! Saved {len(df_final)} rows to {OUTPUT_FILE}")
-else:
-    print("No data was processed.")
\ No newline at end of file
+    if frames:
+        df_final = pd.concat(frames, ignore_index=True)
+        df_final.to_csv(OUTPUT_FILE, index=False)
+        print(f"Success! Saved {len(df_final)} rows to {OUTPUT_FILE}")
+    else:
+        print("No data was processed.")